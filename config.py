@@ -43,6 +43,14 @@ DISCOGS_USER       = os.environ.get("DISCOGS_USER")
 DISCOGS_TOKEN      = os.environ.get("DISCOGS_TOKEN")
 DISCOGS_FOLDER_ID  = int(os.getenv("DISCOGS_FOLDER_ID", "1"))              # 1 = Uncategorized
 VISION_SYNC_CHUNK  = int(os.getenv("VISION_SYNC_CHUNK", "8"))              # <=16; use 4–8 if images are large
+GCS_DOWNLOAD_WORKERS = int(os.getenv("GCS_DOWNLOAD_WORKERS", "16"))        # parallel image downloads before Vision
+VISION_CONCURRENCY = int(os.getenv("VISION_CONCURRENCY", "2"))             # Vision batches in flight at once
+VISION_FULL_DICT   = os.getenv("VISION_FULL_DICT", "").strip().lower() in ("1", "true", "yes")  # keep full Vision responses (debugging)
+VISION_MAX_SIDE    = int(os.getenv("VISION_MAX_SIDE", "1024"))             # downscale larger images before Vision (needs Pillow; 0 = off)
+# Async batch Vision (results written to GCS); used instead of sync calls for large runs when enabled
+VISION_USE_ASYNC_BATCH = os.getenv("VISION_USE_ASYNC_BATCH", "").strip().lower() in ("1", "true", "yes")
+VISION_ASYNC_MIN_IMAGES = int(os.getenv("VISION_ASYNC_MIN_IMAGES", "100"))  # smaller runs stay on the sync path
+VISION_ASYNC_OUTPUT_PREFIX = os.getenv("VISION_ASYNC_OUTPUT_PREFIX", f"gs://{GCS_BUCKET}/vision-output/").strip()
 # Default conditions for collection items
 DISCOGS_MEDIA_CONDITION   = os.getenv("DISCOGS_MEDIA_CONDITION", "Very Good (VG)").strip()
 DISCOGS_SLEEVE_CONDITION  = os.getenv("DISCOGS_SLEEVE_CONDITION", "Good Plus (G+)").strip()
@@ -50,9 +58,18 @@ DISCOGS_SLEEVE_CONDITION  = os.getenv("DISCOGS_SLEEVE_CONDITION", "Good Plus (G+
 FORMAT_FILTER = os.getenv("FORMAT_FILTER", "Vinyl").strip()
 COUNTRY_PREF = os.getenv("COUNTRY_PREF", "US").strip()
 SEARCH_PAGE_SIZE = int(os.getenv("SEARCH_PAGE_SIZE", "10"))
+# API pacing (requests per minute)
+DISCOGS_RATE_LIMIT = int(os.getenv("DISCOGS_RATE_LIMIT", "55"))           # Discogs allows 60/min authenticated
+SPOTIFY_RATE_LIMIT = int(os.getenv("SPOTIFY_RATE_LIMIT", "180"))          # Spotify uses a rolling ~30s window
+SPOTIFY_CONCURRENCY = int(os.getenv("SPOTIFY_CONCURRENCY", "8"))          # Releases matched on Spotify in parallel
+DISCOGS_CONCURRENCY = int(os.getenv("DISCOGS_CONCURRENCY", "8"))          # Images/releases handled against Discogs in parallel
+# Discogs cache: "json" (local file) or "redis" (shared between runners; needs the redis package)
+DISCOGS_CACHE_BACKEND = os.getenv("DISCOGS_CACHE_BACKEND", "json").strip().lower()
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0").strip()
 # Spotify playlist builder
 DISCOGS_PLAYLIST_SOURCE_FOLDER = os.getenv("DISCOGS_PLAYLIST_SOURCE_FOLDER", "").strip()
 SPOTIFY_PLAYLIST_URL = os.getenv("SPOTIFY_PLAYLIST_URL", "").strip()
+SPOTIFY_TOKEN_CACHE = os.path.expanduser(os.getenv("SPOTIFY_TOKEN_CACHE", "~/.cache/vinyl/spotipy_token.json"))
 if not GCS_BUCKET:
     raise SystemExit("VINYL_GCS_BUCKET not set (export it or add it to .env/.env.local).")
 # ======================================
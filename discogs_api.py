@@ -3,26 +3,73 @@ Discogs API client module.
 Handles all interactions with the Discogs API including releases, collections, folders, and conditions.
 """
 
-import time
+import re
+import logging
+import threading
 from functools import lru_cache
+from typing import NamedTuple, Optional
+from concurrent.futures import ThreadPoolExecutor
 from http_client import http_get_with_retry, http_post_with_retry, discogs_headers
 from config import (
     DISCOGS_USER, DISCOGS_TOKEN, FORMAT_FILTER, COUNTRY_PREF, SEARCH_PAGE_SIZE,
     DISCOGS_MEDIA_CONDITION, DISCOGS_SLEEVE_CONDITION
 )
-
+from discogs_cache import get_discogs_result, set_discogs_result
+from fast_json import json_loads, json_dumps
+
+log = logging.getLogger(__name__)
+
+
+class Release(NamedTuple):
+    """A release in a collection folder, as listed by discogs_list_folder_releases."""
+    release_id: int
+    album_title: str
+    artist_name: str
+    year: Optional[int]
+    discogs_url: str
+
+
+# Per-run memo of fetched releases: the same release is often validated several times per image
+# (release URL, master resolution, final check). Failures are not stored so they are retried.
+_RELEASE_MEMO_SIZE = 4096
+_release_memo = {}
+_release_memo_lock = threading.Lock()
+
+def _trim_release(release_data):
+    """Keep only the release fields this tool reads (format/country validation and tracklist)."""
+    return {
+        "formats": [{"name": fmt.get("name")} for fmt in release_data.get("formats", [])],
+        "country": release_data.get("country"),
+        "tracklist": [
+            {"position": t.get("position", ""), "title": t.get("title", ""), "duration": t.get("duration", "")}
+            for t in release_data.get("tracklist", [])
+        ],
+    }
 
 def discogs_get_release(release_id: int, context=None):
-    """Fetch a release and return its data. Returns None on errors."""
-    try:
-        r = http_get_with_retry(f"https://api.discogs.com/releases/{release_id}",
-                                headers=discogs_headers(), timeout=20, tries=6, context=context)
-        time.sleep(0.6)  # Rate limiting
-        return r.json()
-    except Exception as e:
-        context_str = f" [{context}]" if context else ""
-        print(f"Failed to fetch release {release_id}{context_str}: {e}")
-        return None
+    """
+    Fetch a release and return its data, trimmed to formats, country and tracklist.
+    Memoized for this run and cached on disk (see discogs_cache). Returns None on errors.
+    """
+    release_data = _release_memo.get(release_id)
+    if release_data is not None:
+        return release_data
+    release_data = get_discogs_result("release", release_id)
+    if release_data is None:
+        try:
+            r = http_get_with_retry(f"https://api.discogs.com/releases/{release_id}",
+                                    headers=discogs_headers(), timeout=20, tries=6, context=context)
+            release_data = _trim_release(json_loads(r.content))
+        except Exception as e:
+            context_str = f" [{context}]" if context else ""
+            log.info(f"Failed to fetch release {release_id}{context_str}: {e}")
+            return None
+        set_discogs_result("release", release_id, release_data)
+    with _release_memo_lock:
+        if len(_release_memo) >= _RELEASE_MEMO_SIZE:
+            del _release_memo[next(iter(_release_memo))]  # Evict the oldest entry
+        _release_memo[release_id] = release_data
+    return release_data
 
 def validate_release_is_vinyl_and_us(release_data: dict):
     """
@@ -76,29 +123,29 @@ def discogs_search(artist=None, title=None, catno=None, barcode=None, year=None,
     try:
         r = http_get_with_retry("https://api.discogs.com/database/search",
                                 params=params, headers=discogs_headers(), timeout=20, tries=6, context=context)
-        res = r.json().get("results", [])
-        time.sleep(0.6)  # Small delay to avoid rate limiting
+        res = json_loads(r.content).get("results", [])
         return res
     except Exception as e:
         # Log but don't crash - return empty list so the record is marked as review_needed
         context_str = f" [{context}]" if context else ""
-        print(f"Discogs search failed{context_str} (will mark as review_needed): {e}")
+        log.info(f"Discogs search failed{context_str} (will mark as review_needed): {e}")
         return []
 
-def discogs_release_from_master(master_id: int, context=None):
+def _resolve_master(master_id: int, context=None):
     """
-    Resolve a master ID to a concrete release with vinyl and US preference.
-    Prefer main_release if it's vinyl+US; otherwise search versions with filters.
-    Returns (release_id, is_vinyl, is_us, reason) or (None, False, False, reason) on failure.
+    discogs_release_from_master, also reporting whether the lookup completed.
+    Returns (result, complete): complete is False when the master, its main release, a version,
+    or a versions page could not be fetched, so a better release may have been missed.
     """
+    complete = True
     try:
         r = http_get_with_retry(f"https://api.discogs.com/masters/{master_id}",
                                 headers=discogs_headers(), timeout=20, tries=6, context=context)
-        js = r.json()
+        js = json_loads(r.content)
     except Exception as e:
         context_str = f" [{context}]" if context else ""
-        print(f"Failed to resolve master {master_id}{context_str}: {e}")
-        return (None, False, False, f"Failed to fetch master: {e}")
+        log.info(f"Failed to resolve master {master_id}{context_str}: {e}")
+        return (None, False, False, f"Failed to fetch master: {e}"), False
 
     # Check main_release first
     main_release_id = js.get("main_release")
@@ -107,7 +154,7 @@ def discogs_release_from_master(master_id: int, context=None):
         if release_data:
             is_vinyl, is_us, reason = validate_release_is_vinyl_and_us(release_data)
             if is_vinyl and is_us:
-                return (main_release_id, True, True, f"Main release: {reason}")
+                return (main_release_id, True, True, f"Main release: {reason}"), True
             elif is_vinyl:
                 # Keep as candidate but continue searching for US version
                 best_candidate = (main_release_id, True, False, f"Main release: {reason}")
@@ -115,6 +162,7 @@ def discogs_release_from_master(master_id: int, context=None):
                 best_candidate = None
         else:
             best_candidate = None
+            complete = False
     else:
         best_candidate = None
 
@@ -128,7 +176,7 @@ def discogs_release_from_master(master_id: int, context=None):
     try:
         while True:
             vr = http_get_with_retry(vurl, headers=discogs_headers(), params=params, timeout=30, tries=6, context=context)
-            vjs = vr.json()
+            vjs = json_loads(vr.content)
             versions = vjs.get("versions", [])
 
             for v in versions:
@@ -142,24 +190,36 @@ def discogs_release_from_master(master_id: int, context=None):
                     is_vinyl, is_us, reason = validate_release_is_vinyl_and_us(version_data)
                     if is_vinyl and is_us:
                         # Perfect match - return immediately
-                        return (version_id, True, True, f"Version: {reason}")
+                        return (version_id, True, True, f"Version: {reason}"), True
                     elif is_vinyl and not best_candidate:
                         # Keep as fallback if we don't have a candidate yet
                         best_candidate = (version_id, True, False, f"Version: {reason}")
+                else:
+                    complete = False
 
             pg = vjs.get("pagination", {})
             if pg.get("page", 1) < pg.get("pages", 1):
                 params["page"] = pg["page"] + 1
-                time.sleep(0.5)  # Small delay to avoid rate limiting
                 continue
             break
     except Exception as e:
-        print(f"Failed to fetch versions for master {master_id}: {e}")
+        log.info(f"Failed to fetch versions for master {master_id}: {e}")
+        complete = False
 
     # Return best candidate found, or None
     if best_candidate:
-        return best_candidate
-    return (None, False, False, "No vinyl releases found in master")
+        return best_candidate, complete
+    if not complete:
+        return (None, False, False, "Incomplete master lookup (some requests failed)"), False
+    return (None, False, False, "No vinyl releases found in master"), True
+
+def discogs_release_from_master(master_id: int, context=None):
+    """
+    Resolve a master ID to a concrete release with vinyl and US preference.
+    Prefer main_release if it's vinyl+US; otherwise search versions with filters.
+    Returns (release_id, is_vinyl, is_us, reason) or (None, False, False, reason) on failure.
+    """
+    return _resolve_master(master_id, context=context)[0]
 
 @lru_cache(maxsize=1)
 def discogs_get_collection_field_ids(username: str):
@@ -169,7 +229,7 @@ def discogs_get_collection_field_ids(username: str):
     """
     url = f"https://api.discogs.com/users/{username}/collection/fields"
     r = http_get_with_retry(url, headers=discogs_headers(), timeout=20)
-    fields = r.json().get("fields", [])
+    fields = json_loads(r.content).get("fields", [])
     
     field_ids = {}
     for field in fields:
@@ -184,10 +244,10 @@ def discogs_get_collection_field_ids(username: str):
     
     # Debug output if fields not found
     if not field_ids.get("media_condition") or not field_ids.get("sleeve_condition"):
-        print(f"Warning: Could not find all condition fields. Available fields: {[f.get('name') for f in fields]}")
-        print(f"Found field IDs: {field_ids}")
+        log.warning(f"Could not find all condition fields. Available fields: {[f.get('name') for f in fields]}")
+        log.info(f"Found field IDs: {field_ids}")
         # Print all fields for debugging
-        print(f"All available fields: {[(f.get('id'), f.get('name')) for f in fields]}")
+        log.info(f"All available fields: {[(f.get('id'), f.get('name')) for f in fields]}")
     
     return field_ids
 
@@ -201,7 +261,7 @@ def discogs_add_to_collection(username: str, release_id: int, folder_id: int):
     
     r = http_post_with_retry(url, headers=headers, json_data=None, timeout=20)
     # Parse response to get instance_id
-    response_data = r.json() if r.content else {}
+    response_data = json_loads(r.content) if r.content else {}
     instance_id = response_data.get("instance_id") or response_data.get("id")
     return instance_id
 
@@ -212,7 +272,7 @@ def discogs_get_collection_folders(username: str):
     """Return a list of folder IDs in the user's collection."""
     r = http_get_with_retry(f"https://api.discogs.com/users/{username}/collection/folders",
                             headers=discogs_headers(), timeout=20)
-    js = r.json()
+    js = json_loads(r.content)
     return [f["id"] for f in js.get("folders", [])]
 
 @lru_cache(maxsize=32)
@@ -220,7 +280,7 @@ def discogs_get_collection_folders_with_names(username: str):
     """Return a dict mapping folder names to folder IDs."""
     r = http_get_with_retry(f"https://api.discogs.com/users/{username}/collection/folders",
                             headers=discogs_headers(), timeout=20)
-    js = r.json()
+    js = json_loads(r.content)
     return {f["name"]: f["id"] for f in js.get("folders", [])}
 
 def discogs_create_folder(username: str, folder_name: str):
@@ -234,7 +294,7 @@ def discogs_create_folder(username: str, folder_name: str):
     
     try:
         r = http_post_with_retry(url, headers=headers, json_data={"name": folder_name}, timeout=20)
-        response_data = r.json() if r.content else {}
+        response_data = json_loads(r.content) if r.content else {}
         folder_id = response_data.get("id")
         return folder_id
     except Exception as e:
@@ -243,7 +303,7 @@ def discogs_create_folder(username: str, folder_name: str):
         if "409" in error_msg or "already" in error_msg.lower():
             folders = discogs_get_collection_folders_with_names(username)
             return folders.get(folder_name)
-        print(f"Warning: Failed to create folder '{folder_name}': {e}")
+        log.warning(f"Failed to create folder '{folder_name}': {e}")
         return None
 
 def discogs_get_or_create_folder(username: str, folder_name: str):
@@ -257,7 +317,7 @@ def discogs_get_or_create_folder(username: str, folder_name: str):
         return folders[folder_name]
     
     # Create the folder
-    print(f"Creating folder: {folder_name}")
+    log.info(f"Creating folder: {folder_name}")
     folder_id = discogs_create_folder(username, folder_name)
     if folder_id:
         # Clear cache so next call gets updated folder list
@@ -265,6 +325,31 @@ def discogs_get_or_create_folder(username: str, folder_name: str):
         discogs_get_collection_folders.cache_clear()
     return folder_id
 
+def discogs_get_or_create_folders(username: str, folder_names, max_workers: int = 4):
+    """
+    Get folder IDs for several folder names, creating the missing folders concurrently.
+    The folder list is fetched once; pacing comes from the shared Discogs rate limiter.
+    Returns dict folder_name -> folder_id (names that failed to create are omitted).
+    """
+    existing = discogs_get_collection_folders_with_names(username)
+    folder_ids = {name: existing[name] for name in folder_names if name and name in existing}
+    missing = [name for name in folder_names if name and name not in existing]
+    if not missing:
+        return folder_ids
+
+    def create(folder_name):
+        log.info(f"Creating folder: {folder_name}")
+        return discogs_create_folder(username, folder_name)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for folder_name, folder_id in zip(missing, executor.map(create, missing)):
+            if folder_id:
+                folder_ids[folder_name] = folder_id
+    # Clear cache so next call gets updated folder list
+    discogs_get_collection_folders_with_names.cache_clear()
+    discogs_get_collection_folders.cache_clear()
+    return folder_ids
+
 def discogs_move_instance(username: str, release_id: int, instance_id: int, 
                           source_folder_id: int, target_folder_id: int):
     """
@@ -289,44 +374,69 @@ def discogs_move_instance(username: str, release_id: int, instance_id: int,
         # 409 might mean it's already there, which is fine
         if "409" in error_msg or "already" in error_msg.lower():
             return True
-        print(f"Warning: Failed to move instance {instance_id} (release {release_id}) from folder {source_folder_id} to folder {target_folder_id}: {e}")
+        log.warning(f"Failed to move instance {instance_id} (release {release_id}) from folder {source_folder_id} to folder {target_folder_id}: {e}")
         return False
 
+def _fetch_folder_page(username: str, folder_id: int, page: int):
+    """Fetch one page (100 items) of a collection folder listing and return its JSON."""
+    r = http_get_with_retry(
+        f"https://api.discogs.com/users/{username}/collection/folders/{folder_id}/releases",
+        headers=discogs_headers(), params={"per_page": 100, "page": page}, timeout=30
+    )
+    return json_loads(r.content)
+
+def _iter_folder_pages(username: str, folder_id: int, prefetch: bool = True):
+    """
+    Yield the JSON of each page of a collection folder listing.
+    With prefetch=True the next page is requested in the background while the caller
+    processes the current one. Use prefetch=False when the caller may stop early.
+    Pacing comes from the shared Discogs rate limiter in http_client.
+    """
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        js = _fetch_folder_page(username, folder_id, 1)
+        while True:
+            pg = js.get("pagination", {})
+            page = pg.get("page", 1)
+            has_next = page < pg.get("pages", 1)
+            next_page = executor.submit(_fetch_folder_page, username, folder_id, page + 1) if (has_next and prefetch) else None
+            yield js
+            if not has_next:
+                break
+            js = next_page.result() if next_page else _fetch_folder_page(username, folder_id, page + 1)
+
 def discogs_list_folder_release_ids(username: str, folder_id: int):
     """Return a set of release IDs present in a specific folder."""
     ids = set()
-    params = {"per_page": 100, "page": 1}
-    while True:
-        r = http_get_with_retry(
-            f"https://api.discogs.com/users/{username}/collection/folders/{folder_id}/releases",
-            headers=discogs_headers(), params=params, timeout=30
-        )
-        js = r.json()
+    for js in _iter_folder_pages(username, folder_id):
         for item in js.get("releases", []):
             bi = item.get("basic_information", {})
             rid = bi.get("id")
             if rid:
                 ids.add(int(rid))
-        pg = js.get("pagination", {})
-        if pg.get("page", 1) < pg.get("pages", 1):
-            params["page"] = pg["page"] + 1
-            continue
-        break
     return ids
 
+def discogs_list_folder_instances(username: str, folder_id: int):
+    """
+    Map each release in a folder to its collection instance, from one paginated listing.
+    Returns dict release_id -> (instance_id, folder_id); the first instance wins for duplicates.
+    """
+    instances = {}
+    for js in _iter_folder_pages(username, folder_id):
+        for item in js.get("releases", []):
+            bi = item.get("basic_information", {})
+            rid = bi.get("id")
+            instance_id = item.get("instance_id") or item.get("id")
+            if rid and instance_id:
+                instances.setdefault(int(rid), (instance_id, item.get("folder_id") or folder_id))
+    return instances
+
 def discogs_list_folder_releases(username: str, folder_id: int):
     """
     List all releases in a folder with full metadata (title, artist, year, etc.).
-    Returns a list of dicts with: release_id, album_title, artist_name, year, discogs_url
+    Returns a list of Release tuples (release_id, album_title, artist_name, year, discogs_url).
     """
     releases = []
-    params = {"per_page": 100, "page": 1}
-    while True:
-        r = http_get_with_retry(
-            f"https://api.discogs.com/users/{username}/collection/folders/{folder_id}/releases",
-            headers=discogs_headers(), params=params, timeout=30
-        )
-        js = r.json()
+    for js in _iter_folder_pages(username, folder_id):
         for item in js.get("releases", []):
             bi = item.get("basic_information", {})
             release_id = bi.get("id")
@@ -340,44 +450,25 @@ def discogs_list_folder_releases(username: str, folder_id: int):
             resource_url = bi.get("resource_url", "")
             discogs_url = resource_url or f"https://www.discogs.com/release/{release_id}"
             
-            releases.append({
-                "release_id": int(release_id),
-                "album_title": album_title,
-                "artist_name": artist_name,
-                "year": int(year) if year else None,
-                "discogs_url": discogs_url
-            })
-        
-        pg = js.get("pagination", {})
-        if pg.get("page", 1) < pg.get("pages", 1):
-            params["page"] = pg["page"] + 1
-            time.sleep(0.5)  # Rate limiting
-            continue
-        break
+            releases.append(Release(
+                release_id=int(release_id),
+                album_title=album_title,
+                artist_name=artist_name,
+                year=int(year) if year else None,
+                discogs_url=discogs_url
+            ))
     return releases
 
 def discogs_get_release_tracklist(release_id: int):
     """
     Fetch tracklist from Discogs release endpoint.
     Returns a list of dicts with: position, title, duration (if available)
+    Read from the trimmed release (memoized and cached on disk by discogs_get_release).
     """
-    try:
-        release_data = discogs_get_release(release_id)
-        if not release_data:
-            return []
-        
-        tracklist = release_data.get("tracklist", [])
-        tracks = []
-        for track in tracklist:
-            tracks.append({
-                "position": track.get("position", ""),
-                "title": track.get("title", ""),
-                "duration": track.get("duration", "")
-            })
-        return tracks
-    except Exception as e:
-        print(f"Failed to fetch tracklist for release {release_id}: {e}")
+    release_data = discogs_get_release(release_id)
+    if not release_data:
         return []
+    return list(release_data.get("tracklist", []))
 
 def discogs_list_all_collection_release_ids(username: str):
     """Return a set of ALL release IDs in the user's collection (across all folders)."""
@@ -392,13 +483,7 @@ def discogs_get_instance_for_release(username: str, release_id: int, folder_id:
     Returns tuple (instance_id, actual_folder_id) if found, (None, None) otherwise.
     Default folder_id=1 (Uncategorized) since new releases are added there by default.
     """
-    params = {"per_page": 100, "page": 1}
-    while True:
-        r = http_get_with_retry(
-            f"https://api.discogs.com/users/{username}/collection/folders/{folder_id}/releases",
-            headers=discogs_headers(), params=params, timeout=30
-        )
-        js = r.json()
+    for js in _iter_folder_pages(username, folder_id, prefetch=False):
         for item in js.get("releases", []):
             bi = item.get("basic_information", {})
             item_release_id = bi.get("id")
@@ -407,12 +492,6 @@ def discogs_get_instance_for_release(username: str, release_id: int, folder_id:
                 instance_id = item.get("instance_id") or item.get("id")
                 actual_folder_id = item.get("folder_id") or folder_id
                 return (instance_id, actual_folder_id)
-        pg = js.get("pagination", {})
-        if pg.get("page", 1) < pg.get("pages", 1):
-            params["page"] = pg["page"] + 1
-            time.sleep(0.5)
-            continue
-        break
     return (None, None)
 
 def discogs_get_instance_conditions(username: str, folder_id: int, release_id: int, instance_id: int):
@@ -432,24 +511,14 @@ def discogs_get_instance_conditions(username: str, folder_id: int, release_id: i
     url = f"https://api.discogs.com/users/{username}/collection/folders/{folder_id}/releases/{release_id}/instances/{instance_id}"
     try:
         r = http_get_with_retry(url, headers=discogs_headers(), timeout=20)
-        instance_data = r.json()
+        instance_data = json_loads(r.content)
         
         # Read conditions from notes/fields array
-        notes = instance_data.get("notes", [])
-        media_condition = None
-        sleeve_condition = None
-        
-        for note in notes:
-            note_field_id = note.get("field_id")
-            note_value = note.get("value")
-            if note_field_id == media_field_id:
-                media_condition = note_value
-            elif note_field_id == sleeve_field_id:
-                sleeve_condition = note_value
+        notes_by_field = {n["field_id"]: n.get("value") for n in instance_data.get("notes", []) if "field_id" in n}
         
         return {
-            "media_condition": media_condition,
-            "sleeve_condition": sleeve_condition
+            "media_condition": notes_by_field.get(media_field_id),
+            "sleeve_condition": notes_by_field.get(sleeve_field_id)
         }
     except Exception as e:
         # If we can't fetch, assume no conditions set
@@ -469,24 +538,19 @@ def discogs_list_all_collection_instances(username: str):
     sleeve_field_id = field_ids.get("sleeve_condition")
     
     if not media_field_id or not sleeve_field_id:
-        print("ERROR: Could not find Media Condition or Sleeve Condition field IDs. Skipping condition updates.")
-        print(f"Available fields: {[(f.get('id'), f.get('name')) for f in discogs_get_collection_field_ids.__wrapped__(username).get('fields', [])]}")
+        log.error("Could not find Media Condition or Sleeve Condition field IDs. Skipping condition updates.")
+        # discogs_get_collection_field_ids already logged every available field
+        log.error(f"Found field IDs: {field_ids}")
         return instances
     
-    print(f"Using field IDs - Media: {media_field_id}, Sleeve: {sleeve_field_id}")
+    log.info(f"Using field IDs - Media: {media_field_id}, Sleeve: {sleeve_field_id}")
     
     # Get all folders and iterate through each one
     folders = discogs_get_collection_folders(username)
-    print(f"Found {len(folders)} folders to check")
+    log.info(f"Found {len(folders)} folders to check")
     
     for folder_id in folders:
-        params = {"per_page": 100, "page": 1}
-        while True:
-            r = http_get_with_retry(
-                f"https://api.discogs.com/users/{username}/collection/folders/{folder_id}/releases",
-                headers=discogs_headers(), params=params, timeout=30
-            )
-            js = r.json()
+        for js in _iter_folder_pages(username, folder_id):
             for item in js.get("releases", []):
                 bi = item.get("basic_information", {})
                 release_id = bi.get("id")  # Release ID from basic_information
@@ -503,40 +567,22 @@ def discogs_list_all_collection_instances(username: str):
                 # Validate instance_id != release_id (they should be different)
                 if instance_id == release_id:
                     # This shouldn't happen, but log and skip
-                    if len(instances) == 0:  # Only print first occurrence
-                        import json
-                        print(f"DEBUG: Found item where instance_id == release_id ({release_id}) in folder {folder_id}")
-                        print(f"DEBUG: Item keys: {list(item.keys())}")
-                        print(f"DEBUG: Full item JSON:\n{json.dumps(item, indent=2)}")
+                    if len(instances) == 0 and log.isEnabledFor(logging.DEBUG):  # Only log first occurrence
+                        log.debug(f"Found item where instance_id == release_id ({release_id}) in folder {folder_id}")
+                        log.debug(f"Item keys: {list(item.keys())}")
+                        log.debug(f"Full item JSON:\n{json_dumps(item, indent=True)}")
                     continue
                 
-                # Read conditions from notes/fields array
-                notes = item.get("notes", [])
-                media_condition = None
-                sleeve_condition = None
-                
-                for note in notes:
-                    note_field_id = note.get("field_id")
-                    note_value = note.get("value")
-                    if note_field_id == media_field_id:
-                        media_condition = note_value
-                    elif note_field_id == sleeve_field_id:
-                        sleeve_condition = note_value
+                # Read conditions from notes/fields array (one dict build, two lookups)
+                notes_by_field = {n["field_id"]: n.get("value") for n in item.get("notes", []) if "field_id" in n}
                 
                 instances.append({
                     "release_id": int(release_id),
                     "instance_id": int(instance_id),
                     "folder_id": int(actual_folder_id),  # Use folder_id from item, or folder we're iterating through
-                    "media_condition": media_condition,
-                    "sleeve_condition": sleeve_condition
+                    "media_condition": notes_by_field.get(media_field_id),
+                    "sleeve_condition": notes_by_field.get(sleeve_field_id)
                 })
-            
-            pg = js.get("pagination", {})
-            if pg.get("page", 1) < pg.get("pages", 1):
-                params["page"] = pg["page"] + 1
-                time.sleep(0.5)  # Small delay to avoid rate limiting
-                continue
-            break
     
     return instances
 
@@ -563,7 +609,6 @@ def discogs_update_instance_condition(username: str, folder_id: int, release_id:
     if media_condition:
         url_media = f"https://api.discogs.com/users/{username}/collection/folders/{folder_id}/releases/{release_id}/instances/{instance_id}/fields/{media_field_id}"
         http_post_with_retry(url_media, headers=headers, json_data={"value": media_condition}, timeout=20)
-        time.sleep(0.6)  # Rate limiting between field updates
     
     # Update Sleeve Condition (only if provided)
     if sleeve_condition:
@@ -573,12 +618,40 @@ def discogs_update_instance_condition(username: str, folder_id: int, release_id:
     return True
 
 # Micro-caches to reduce duplicate calls
-@lru_cache(maxsize=4096)
-def cached_release_from_master(master_id: int):
-    return discogs_release_from_master(master_id, context=None)
+def cached_release_from_master(master_id: int, context=None):
+    """
+    discogs_release_from_master backed by the on-disk Discogs cache (7-day TTL).
+    Only completed lookups are cached; if any master/release/versions request failed,
+    the result is returned but retried on the next run.
+    """
+    cached = get_discogs_result("master", master_id)
+    if cached is not None:
+        return tuple(cached)
+    result, complete = _resolve_master(master_id, context=context)
+    if complete:
+        set_discogs_result("master", master_id, list(result))
+    return result
+
+_SEARCH_KEY_STRIP_RE = re.compile(r"[^\w\s]")
+
+def _search_key_part(text):
+    """Normalize an OCR hint for cache keys: drop punctuation, collapse whitespace, lowercase."""
+    return " ".join(_SEARCH_KEY_STRIP_RE.sub("", text).split()).lower()
 
 def cached_discogs_search(artist, title, context=None):
-    # Note: Can't use lru_cache with context parameter, so we'll call discogs_search directly
-    # Returns list of results, not single result
-    return discogs_search(artist=artist, title=title, context=context)
+    """
+    discogs_search backed by the on-disk Discogs cache (7-day TTL), which also serves repeats within a run.
+    Hints that differ only in punctuation, spacing or case share one cache entry.
+    Returns list of results (id and uri only), not single result.
+    Empty results are not cached since discogs_search also returns [] on request failures.
+    """
+    key = f"{_search_key_part(artist)}|{_search_key_part(title)}"
+    cached = get_discogs_result("search", key)
+    if cached is not None:
+        return cached
+    results = [{"id": hit.get("id"), "uri": hit.get("uri")}
+               for hit in discogs_search(artist=artist, title=title, context=context)]
+    if results:
+        set_discogs_result("search", key, results)
+    return results
 
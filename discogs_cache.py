@@ -0,0 +1,141 @@
+"""
+Discogs result caching module.
+Persists resolved Discogs lookups to disk so re-runs don't spend API quota on IDs already seen.
+With DISCOGS_CACHE_BACKEND=redis, lookups are also shared through Redis so several runners
+(e.g. on different --input-prefix subsets) reuse each other's results.
+"""
+
+import os
+import time
+import threading
+from fast_json import json_loads, json_dumps
+from config import DISCOGS_CACHE_BACKEND, REDIS_URL
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+DISCOGS_CACHE_FILE = "discogs_cache.json"
+DISCOGS_CACHE_TTL = 7 * 24 * 60 * 60  # 7 days
+REDIS_KEY_PREFIX = "discogs:"
+
+_cache = None
+_lock = threading.Lock()
+_redis = None
+_redis_checked = False
+
+def _get_redis():
+    """Return the shared Redis client, or None when the Redis backend is off or unavailable."""
+    global _redis, _redis_checked
+    if _redis_checked:
+        return _redis
+    with _lock:
+        if _redis_checked:
+            return _redis
+        if DISCOGS_CACHE_BACKEND == "redis":
+            if not REDIS_AVAILABLE:
+                print("Warning: DISCOGS_CACHE_BACKEND=redis but the redis package is not installed. Using the local cache only.")
+            else:
+                try:
+                    client = redis.Redis.from_url(REDIS_URL)
+                    client.ping()
+                    _redis = client
+                except Exception as e:
+                    print(f"Warning: Could not connect to Redis at {REDIS_URL}: {e}. Using the local cache only.")
+        _redis_checked = True
+    return _redis
+
+def load_discogs_cache():
+    """Load previously saved Discogs results from JSON file (once per process)."""
+    global _cache
+    if _cache is not None:
+        return _cache
+    with _lock:  # Lookups may come from several worker threads at once
+        if _cache is not None:
+            return _cache
+        cache = {}
+        if os.path.exists(DISCOGS_CACHE_FILE):
+            try:
+                with open(DISCOGS_CACHE_FILE, 'rb') as f:
+                    cache = json_loads(f.read())
+            except Exception as e:
+                print(f"Warning: Could not load Discogs cache: {e}. Starting fresh.")
+                cache = {}
+        _cache = cache
+    return _cache
+
+def save_discogs_cache():
+    """Save Discogs results to JSON file (atomically), dropping expired entries."""
+    if _cache is None:
+        return
+    now = time.time()
+    with _lock:
+        for key in [k for k, (ts, _) in _cache.items() if now - ts > DISCOGS_CACHE_TTL]:
+            del _cache[key]
+        data = json_dumps(_cache)
+    tmp_path = DISCOGS_CACHE_FILE + ".tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(tmp_path, DISCOGS_CACHE_FILE)
+    except Exception as e:
+        print(f"Warning: Could not save Discogs cache: {e}")
+
+def invalidate_discogs_cache():
+    """Discard all cached Discogs results: in memory, on disk, and in Redis when enabled."""
+    global _cache
+    with _lock:
+        _cache = {}
+    try:
+        os.remove(DISCOGS_CACHE_FILE)
+        print(f"Removed Discogs cache file {DISCOGS_CACHE_FILE}")
+    except FileNotFoundError:
+        pass
+    client = _get_redis()
+    if client is not None:
+        try:
+            keys = list(client.scan_iter(match=REDIS_KEY_PREFIX + "*", count=1000))
+            if keys:
+                client.delete(*keys)
+            print(f"Removed {len(keys)} shared Discogs cache entries from Redis")
+        except Exception as e:
+            print(f"Warning: Could not clear Redis Discogs cache: {e}")
+
+def get_discogs_result(kind, key):
+    """Get a cached Discogs result (e.g. kind='master', key=master_id). Returns None if missing or expired."""
+    cache_key = f"{kind}:{key}"
+    cache = load_discogs_cache()
+    entry = cache.get(cache_key)
+    if not entry:
+        client = _get_redis()
+        if client is None:
+            return None
+        try:
+            raw = client.get(REDIS_KEY_PREFIX + cache_key)
+        except Exception:
+            return None
+        if raw is None:
+            return None
+        entry = json_loads(raw)
+        with _lock:
+            cache[cache_key] = entry  # Keep a local copy for the rest of the run and the JSON file
+    ts, value = entry
+    if time.time() - ts > DISCOGS_CACHE_TTL:
+        return None
+    return value
+
+def set_discogs_result(kind, key, value):
+    """Store a Discogs result with the current timestamp (written through to Redis when enabled)."""
+    cache_key = f"{kind}:{key}"
+    entry = [time.time(), value]
+    cache = load_discogs_cache()
+    with _lock:  # Keeps inserts from racing a save_discogs_cache snapshot
+        cache[cache_key] = entry
+    client = _get_redis()
+    if client is not None:
+        try:
+            client.setex(REDIS_KEY_PREFIX + cache_key, DISCOGS_CACHE_TTL, json_dumps(entry))
+        except Exception as e:
+            print(f"Warning: Could not write Discogs result to Redis: {e}")
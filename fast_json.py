@@ -0,0 +1,27 @@
+"""
+JSON encode/decode helpers.
+Uses orjson when installed (several times faster on large Discogs pages and cache files),
+otherwise falls back to the standard library json module.
+"""
+
+import json
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def json_loads(data):
+    """Parse JSON from bytes or str."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def json_dumps(obj, indent: bool = False) -> str:
+    """Serialize obj to a JSON string (2-space indent if requested)."""
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_INDENT_2 if indent else 0
+        return orjson.dumps(obj, option=option).decode()
+    return json.dumps(obj, indent=2 if indent else None)
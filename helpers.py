@@ -3,12 +3,37 @@ Helper utilities for GCS URI parsing, URL extraction, confidence scoring, and GC
 """
 
 import re
+import csv
+import logging
 import posixpath
 from urllib.parse import urlparse
 import config
 from config import GCS_BUCKET
 from google.cloud import storage
 
+log = logging.getLogger(__name__)
+
+# .jpg/.jpeg/.png in any letter case, matched server-side by GCS
+IMAGE_MATCH_GLOB = "**.{[jJ][pP][gG],[jJ][pP][eE][gG],[pP][nN][gG]}"
+# Only blob names are needed when listing; skip the rest of the object metadata
+GCS_LIST_FIELDS = "items(name),nextPageToken"
+
+
+def list_image_names(bucket, prefix: str):
+    """
+    Yield names of image objects under prefix.
+    Filtering happens server-side via match_glob, so non-image objects are never sent back.
+    """
+    for blob in bucket.list_blobs(prefix=prefix, match_glob=IMAGE_MATCH_GLOB, fields=GCS_LIST_FIELDS):
+        yield blob.name
+
+def progress_milestones(total: int, step: int = 10, max_lines: int = 100) -> frozenset:
+    """
+    Item numbers (1-based) at which to print progress: every `step` items and the last one.
+    The step widens on large runs so at most about max_lines progress lines are printed.
+    """
+    step = max(step, -(-total // max_lines))
+    return frozenset(range(step, total + 1, step)) | {total}
 
 def gcs_uri(obj: str) -> str:
     return f"gs://{GCS_BUCKET}/{obj}"
@@ -99,16 +124,15 @@ def owner_from_gcs_uri(uri: str) -> str:
     # Join all folder components with underscores
     return "_".join(folder_parts) if folder_parts else ""
 
+_RELEASE_OR_MASTER_PATH_RE = re.compile(r"/(release|master)/(\d+)")
+
 def extract_release_or_master(url: str):
     """Return ('release'|'master', id) if URL matches Discogs structure."""
     try:
         path = urlparse(url).path
-        m = re.search(r"/release/(\d+)", path)
-        if m:
-            return ("release", int(m.group(1)))
-        m = re.search(r"/master/(\d+)", path)
+        m = _RELEASE_OR_MASTER_PATH_RE.search(path)
         if m:
-            return ("master", int(m.group(1)))
+            return (m.group(1), int(m.group(2)))
     except Exception:
         pass
     return (None, None)
@@ -154,20 +178,30 @@ def get_folders_from_gcs_prefix(prefix: str):
     try:
         gcs = storage.Client()
         bucket = gcs.bucket(GCS_BUCKET)
-        # List all blobs under the prefix
-        blobs = bucket.list_blobs(prefix=prefix)
-        
+        # List all images under the prefix
         folder_names = set()
-        for blob in blobs:
-            if blob.name.lower().endswith((".jpg", ".jpeg", ".png")):
-                # Extract folder name using the same logic as owner_from_gcs_uri
-                uri = gcs_uri(blob.name)
-                folder_name = owner_from_gcs_uri(uri)
-                if folder_name:
-                    folder_names.add(folder_name)
+        for name in list_image_names(bucket, prefix):
+            # Extract folder name using the same logic as owner_from_gcs_uri
+            folder_name = owner_from_gcs_uri(gcs_uri(name))
+            if folder_name:
+                folder_names.add(folder_name)
         
         return folder_names
     except Exception as e:
-        print(f"Warning: Could not list GCS blobs under prefix '{prefix}': {e}")
+        log.warning(f"Could not list GCS blobs under prefix '{prefix}': {e}")
         return set()
 
+def write_dicts_csv(path: str, rows, fieldnames):
+    """
+    Write an iterable of row dicts to CSV with a header, streaming through a buffered file.
+    Keys missing from a row are written as empty cells.
+    Returns the number of rows written.
+    """
+    count = 0
+    with open(path, 'w', newline='', encoding='utf-8', buffering=1 << 20) as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
@@ -5,11 +5,20 @@ Handles rate limiting, exponential backoff, and error handling.
 
 import time
 import random
+import logging
 import requests
+from requests.adapters import HTTPAdapter
 from config import (
     DISCOGS_APP_NAME, DISCOGS_APP_VERSION, DISCOGS_CONTACT, 
     DISCOGS_APP_URL, DISCOGS_TOKEN
 )
+from rate_limit import DISCOGS_LIMITER
+
+log = logging.getLogger(__name__)
+
+# One pooled session for all Discogs calls so TCP/TLS connections are reused (keep-alive)
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
 
 
 def discogs_headers():
@@ -36,84 +45,74 @@ def discogs_headers():
     return headers
 
 
-def http_get_with_retry(url, *, params=None, headers=None, timeout=20, tries=4, base_delay=0.8, context=None):
+RETRY_MAX_DELAY = 20.0  # Cap (seconds) on the exponential backoff curve
+
+
+def retry_delay(attempt, base_delay=0.8, retry_after=None):
     """
-    HTTP GET with retry logic.
-    context: Optional string to include in retry messages (e.g., "image 5/221")
+    Seconds to wait before retry `attempt` (1-based).
+    Honors a Retry-After header value when present; otherwise exponential backoff with
+    "full jitter" (uniform between 0 and the capped curve), so concurrent workers that hit
+    a 429 together spread their retries out instead of retrying in lockstep.
     """
-    for attempt in range(1, tries + 1):
+    if retry_after:
         try:
-            r = requests.get(url, params=params, headers=headers, timeout=timeout)
-            if r.status_code in (429, 500, 502, 503, 504):
-                # For 429, check for Retry-After header
-                if r.status_code == 429:
-                    retry_after = r.headers.get("Retry-After")
-                    if retry_after:
-                        try:
-                            delay = int(retry_after) + random.uniform(0, 1)
-                        except (ValueError, TypeError):
-                            delay = base_delay * (2 ** (attempt - 1)) + random.uniform(0, 0.25)
-                    else:
-                        # Exponential backoff with jitter, longer for 429
-                        delay = base_delay * (2 ** (attempt - 1)) * 2 + random.uniform(0, 1)
-                    
-                    if attempt < tries:
-                        context_str = f" [{context}]" if context else ""
-                        print(f"GET retry {attempt}/{tries-1} after 429 rate limit{context_str} (sleep {delay:.1f}s)")
-                        time.sleep(delay)
-                        continue
-                    else:
-                        raise requests.HTTPError(f"Transient {r.status_code}", response=r)
-                else:
-                    raise requests.HTTPError(f"Transient {r.status_code}", response=r)
-            r.raise_for_status()
-            return r
-        except requests.HTTPError as e:
-            if attempt == tries:
-                raise
-            # For non-429 errors, use standard exponential backoff
-            if e.response and e.response.status_code != 429:
-                delay = base_delay * (2 ** (attempt - 1)) + random.uniform(0, 0.25)
-                context_str = f" [{context}]" if context else ""
-                print(f"GET retry {attempt}/{tries-1} after error: {e}{context_str} (sleep {delay:.1f}s)")
-                time.sleep(delay)
-        except Exception as e:
-            if attempt == tries:
-                raise
-            delay = base_delay * (2 ** (attempt - 1)) + random.uniform(0, 0.25)
-            context_str = f" [{context}]" if context else ""
-            print(f"GET retry {attempt}/{tries-1} after error: {e}{context_str} (sleep {delay:.1f}s)")
-            time.sleep(delay)
+            return float(retry_after) + random.uniform(0, 1)
+        except (ValueError, TypeError):
+            pass
+    return random.uniform(0, min(RETRY_MAX_DELAY, base_delay * (2 ** attempt)))
 
-def http_post_with_retry(url, *, headers=None, json_data=None, timeout=20, tries=4, base_delay=0.8):
-    """HTTP POST with retry logic."""
-    for attempt in range(1, tries + 1):
-        try:
-            r = requests.post(url, headers=headers, json=json_data, timeout=timeout)
-            if r.status_code in (429, 500, 502, 503, 504):
-                raise requests.HTTPError(f"Transient {r.status_code}", response=r)
-            r.raise_for_status()
-            return r
-        except Exception as e:
-            if attempt == tries:
-                raise
-            delay = base_delay * (2 ** (attempt - 1)) + random.uniform(0, 0.25)
-            print(f"POST retry {attempt}/{tries-1} after error: {e} (sleep {delay:.1f}s)")
-            time.sleep(delay)
 
-def http_put_with_retry(url, *, headers=None, json_data=None, timeout=20, tries=4, base_delay=0.8):
-    """HTTP PUT with retry logic."""
+_TRANSIENT_STATUSES = (429, 500, 502, 503, 504)
+
+
+def _send_with_retry(method, url, *, tries, base_delay, context=None, **kwargs):
+    """
+    Send a Discogs request, retrying transient errors (429/5xx, connection errors, timeouts).
+    Other HTTP errors (404, 409, ...) are raised at once without sleeping.
+    Each attempt takes a token from the shared Discogs rate limiter; 429s wait for Retry-After.
+    """
+    verb = method.upper()
+    context_str = f" [{context}]" if context else ""
     for attempt in range(1, tries + 1):
         try:
-            r = requests.put(url, headers=headers, json=json_data, timeout=timeout)
-            if r.status_code in (429, 500, 502, 503, 504):
+            DISCOGS_LIMITER.acquire()
+            r = _session.request(method, url, **kwargs)
+            if r.status_code in _TRANSIENT_STATUSES:
                 raise requests.HTTPError(f"Transient {r.status_code}", response=r)
             r.raise_for_status()
             return r
-        except Exception as e:
+        except (requests.HTTPError, requests.ConnectionError, requests.Timeout) as e:
+            response = getattr(e, "response", None)
+            if isinstance(e, requests.HTTPError) and (response is None or response.status_code not in _TRANSIENT_STATUSES):
+                raise  # Client errors won't succeed on retry
             if attempt == tries:
                 raise
-            delay = base_delay * (2 ** (attempt - 1)) + random.uniform(0, 0.25)
-            print(f"PUT retry {attempt}/{tries-1} after error: {e} (sleep {delay:.1f}s)")
+            if response is not None and response.status_code == 429:
+                retry_after = response.headers.get("Retry-After")
+                # No Retry-After: back off longer than for server errors
+                delay = retry_delay(attempt, base_delay * 2, retry_after)
+                log.info(f"{verb} retry {attempt}/{tries-1} after 429 rate limit{context_str} (sleep {delay:.1f}s)")
+            else:
+                delay = retry_delay(attempt, base_delay)
+                log.info(f"{verb} retry {attempt}/{tries-1} after error: {e}{context_str} (sleep {delay:.1f}s)")
             time.sleep(delay)
 
+
+def http_get_with_retry(url, *, params=None, headers=None, timeout=20, tries=4, base_delay=0.8, context=None):
+    """
+    HTTP GET with retry logic. Each attempt takes a token from the shared Discogs rate limiter.
+    context: Optional string to include in retry messages (e.g., "image 5/221")
+    """
+    return _send_with_retry("get", url, params=params, headers=headers, timeout=timeout,
+                            tries=tries, base_delay=base_delay, context=context)
+
+def http_post_with_retry(url, *, headers=None, json_data=None, timeout=20, tries=4, base_delay=0.8):
+    """HTTP POST with retry logic. Each attempt takes a token from the shared Discogs rate limiter."""
+    return _send_with_retry("post", url, headers=headers, json=json_data, timeout=timeout,
+                            tries=tries, base_delay=base_delay)
+
+def http_put_with_retry(url, *, headers=None, json_data=None, timeout=20, tries=4, base_delay=0.8):
+    """HTTP PUT with retry logic. Each attempt takes a token from the shared Discogs rate limiter."""
+    return _send_with_retry("put", url, headers=headers, json=json_data, timeout=timeout,
+                            tries=tries, base_delay=base_delay)
@@ -0,0 +1,46 @@
+"""
+Rate limiting for API calls.
+Token buckets shared by every call site (and thread) that talks to the same API.
+"""
+
+import time
+import threading
+from config import DISCOGS_RATE_LIMIT, SPOTIFY_RATE_LIMIT
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+    Refills continuously at `rate` tokens per second, holding at most `capacity` tokens.
+    acquire() blocks until a token is available.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._last = time.monotonic()
+        self._cond = threading.Condition()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self, tokens: int = 1):
+        """Block until `tokens` tokens are available, then consume them."""
+        with self._cond:
+            while True:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                self._cond.wait((tokens - self._tokens) / self.rate)
+
+
+# Discogs allows 60 authenticated requests per minute over a moving window.
+# Keep the burst small so burst + sustained rate never exceeds that window.
+DISCOGS_LIMITER = TokenBucket(DISCOGS_RATE_LIMIT / 60.0, capacity=max(1, 60 - DISCOGS_RATE_LIMIT))
+
+# Spotify doesn't publish a fixed quota; pace to SPOTIFY_RATE_LIMIT with a short burst allowance.
+SPOTIFY_LIMITER = TokenBucket(SPOTIFY_RATE_LIMIT / 60.0, capacity=10)
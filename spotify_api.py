@@ -5,16 +5,48 @@ Handles Spotify authentication, search, and playlist operations.
 
 import os
 import re
+import difflib
+import logging
 import time
+from functools import lru_cache
+from config import SPOTIFY_TOKEN_CACHE
+from rate_limit import SPOTIFY_LIMITER
+from http_client import retry_delay
+from spotify_cache import spotify_cache_key, get_spotify_result, set_spotify_result
 
 try:
     import spotipy
     from spotipy.oauth2 import SpotifyOAuth
+    from spotipy.cache_handler import CacheFileHandler
     SPOTIPY_AVAILABLE = True
 except ImportError:
     SPOTIPY_AVAILABLE = False
 
+log = logging.getLogger(__name__)
 
+
+def _spotify_call(method, *args, tries=4, **kwargs):
+    """
+    Call a spotipy client method after taking a token from the shared Spotify rate limiter.
+    On 429, waits for the Retry-After header (or exponential backoff) and retries.
+    """
+    for attempt in range(1, tries + 1):
+        SPOTIFY_LIMITER.acquire()
+        try:
+            return method(*args, **kwargs)
+        except spotipy.SpotifyException as e:
+            if e.http_status != 429 or attempt == tries:
+                raise
+            retry_after = (e.headers or {}).get("Retry-After")
+            delay = retry_delay(attempt, base_delay=1.0, retry_after=retry_after)
+            log.info(f"Spotify retry {attempt}/{tries-1} after 429 rate limit (sleep {delay:.1f}s)")
+            time.sleep(delay)
+
+# Match pattern like "Artist Name (2)" or "Artist Name (123)"
+# This regex matches: optional whitespace, opening paren, one or more digits, closing paren, end of string
+_DISCOGS_ARTIST_NUMBER_RE = re.compile(r'\s*\(\d+\)\s*$')
+
+@lru_cache(maxsize=4096)
 def clean_artist_name_for_spotify(artist_name: str):
     """
     Strip Discogs parenthetical numbering from artist names.
@@ -24,9 +56,7 @@ def clean_artist_name_for_spotify(artist_name: str):
     if not artist_name:
         return artist_name
     
-    # Match pattern like "Artist Name (2)" or "Artist Name (123)"
-    # This regex matches: optional whitespace, opening paren, one or more digits, closing paren, end of string
-    cleaned = re.sub(r'\s*\(\d+\)\s*$', '', artist_name).strip()
+    cleaned = _DISCOGS_ARTIST_NUMBER_RE.sub('', artist_name).strip()
     return cleaned
 
 def spotify_authenticate():
@@ -52,22 +82,58 @@ def spotify_authenticate():
     
     try:
         scope = "playlist-modify-private playlist-modify-public"
+        # Persist the OAuth token so re-runs refresh silently instead of repeating the browser flow
+        os.makedirs(os.path.dirname(SPOTIFY_TOKEN_CACHE), exist_ok=True)
         auth_manager = SpotifyOAuth(
             client_id=client_id,
             client_secret=client_secret,
             redirect_uri=redirect_uri,
-            scope=scope
+            scope=scope,
+            cache_handler=CacheFileHandler(cache_path=SPOTIFY_TOKEN_CACHE)
         )
-        sp = spotipy.Spotify(auth_manager=auth_manager)
+        # requests_session=True: one pooled keep-alive session for all Web API calls
+        sp = spotipy.Spotify(auth_manager=auth_manager, requests_session=True)
         # Test authentication
-        sp.current_user()
+        _spotify_call(sp.current_user)
         return sp
     except Exception as e:
         raise SystemExit(f"Spotify authentication failed: {e}\nCheck your credentials and redirect URI.")
 
-def spotify_search_album(album_title: str, artist_name: str, discogs_year: int = None, sp=None):
+def spotify_search_artist_albums(artist_name: str, min_results: int = 20, sp=None):
+    """
+    Fetch albums for an artist with a single artist-scoped search (paginated).
+    Lets many releases by the same artist share one query instead of one search each.
+    Returns dict mapping lowercased album name -> list of album dicts.
+    """
+    if not sp or not artist_name:
+        return {}
+    
+    cleaned_artist = clean_artist_name_for_spotify(artist_name)
+    albums_by_name = {}
+    fetched = 0
+    
+    try:
+        results = _spotify_call(sp.search, q=f'artist:"{cleaned_artist}"', type="album", limit=50)
+        while results:
+            page = results.get("albums", {})
+            for album in page.get("items", []):
+                albums_by_name.setdefault(album.get("name", "").lower(), []).append(album)
+                fetched += 1
+            
+            if fetched >= min_results or not page.get("next"):
+                break
+            results = _spotify_call(sp.next, page)
+    except Exception as e:
+        log.info(f"Spotify artist search error for '{artist_name}': {e}")
+    
+    return albums_by_name
+
+def spotify_search_album(album_title: str, artist_name: str, discogs_year: int = None, sp=None, candidates=None):
     """
     Search Spotify for album with matching heuristics.
+    candidates: Optional dict from spotify_search_artist_albums. If it holds an exact
+                title/artist match, that album is used without issuing a search.
+    Outcomes (including misses) are cached on disk; a cached hit returns (album_id, None).
     Returns (album_id, album_data) or (None, None) if not found.
     """
     if not sp:
@@ -76,78 +142,99 @@ def spotify_search_album(album_title: str, artist_name: str, discogs_year: int =
     # Clean artist name to remove Discogs parenthetical numbering
     cleaned_artist = clean_artist_name_for_spotify(artist_name)
     
+    cache_key = spotify_cache_key(album_title, cleaned_artist, discogs_year)
+    found, album_id = get_spotify_result("album", cache_key)
+    if found:
+        return album_id, None
+    
+    if candidates:
+        album_id, album = _pick_album(candidates.get(album_title.lower(), []), album_title,
+                                      cleaned_artist, discogs_year, exact_only=True)
+        if album_id:
+            set_spotify_result("album", cache_key, album_id)
+            return album_id, album
+    
     # Build query
     query = f'album:"{album_title}" artist:"{cleaned_artist}"'
     
     try:
-        results = sp.search(q=query, type="album", limit=20)
+        results = _spotify_call(sp.search, q=query, type="album", limit=20)
         albums = results.get("albums", {}).get("items", [])
-        
-        if not albums:
-            return None, None
-        
+        album_id, album = _pick_album(albums, album_title, cleaned_artist, discogs_year)
+        set_spotify_result("album", cache_key, album_id)
+        return album_id, album
+    except Exception as e:
+        log.info(f"Spotify search error for album '{album_title}' by '{artist_name}': {e}")
+        return None, None
+
+# Edition keywords: Discogs title asking for a special edition, and Spotify album names that are one
+_DISCOGS_DELUXE_RE = re.compile(r'deluxe|special|expanded|remastered', re.I)
+_SPOTIFY_DELUXE_RE = re.compile(r'deluxe|special|expanded', re.I)
+_SPOTIFY_NON_CANONICAL_RE = re.compile(r'deluxe|special edition|expanded', re.I)
+
+def _album_year_diff(album, discogs_year):
+    """Years between Spotify release_date and the Discogs year, or None if unknown."""
+    try:
+        return abs(int(album.get("release_date", "").split("-")[0]) - discogs_year)
+    except (ValueError, IndexError):
+        return None
+
+def _pick_album(albums, album_title: str, cleaned_artist: str, discogs_year: int = None, exact_only: bool = False):
+    """
+    Apply the album matching heuristics to a list of Spotify album results in one scored pass.
+    Exact title/artist matches within ±2 years of Discogs rank first, closest year first and then
+    result order. The rest fall back to edition preference (canonical unless the Discogs title
+    says deluxe/special/...), then result order.
+    exact_only: If True, return (None, None) rather than the first result when nothing matches exactly.
+    Returns (album_id, album_data) or (None, None).
+    """
+    if not albums:
+        return None, None
+    
+    album_title_lower = album_title.lower()
+    cleaned_artist_lower = cleaned_artist.lower()
+    wants_deluxe = bool(_DISCOGS_DELUXE_RE.search(album_title))
+    
+    best_score = None
+    best_album = None
+    for idx, album in enumerate(albums):
         # Heuristic 1: Exact (case-insensitive) match on album title and artist
-        exact_matches = []
-        cleaned_artist_lower = cleaned_artist.lower()
-        for album in albums:
-            album_name = album.get("name", "").lower()
-            album_artists = [a.get("name", "").lower() for a in album.get("artists", [])]
-            
-            if album_name == album_title.lower() and cleaned_artist_lower in album_artists:
-                exact_matches.append(album)
-        
-        if len(exact_matches) == 1:
-            return exact_matches[0].get("id"), exact_matches[0]
+        name = album.get("name", "")
+        if name.lower() != album_title_lower:
+            continue
+        if not any(a.get("name", "").lower() == cleaned_artist_lower for a in album.get("artists", [])):
+            continue
         
-        if len(exact_matches) > 1 and discogs_year:
-            # Heuristic 2: Prefer release year closest to Discogs year (±2 years)
-            best_match = None
-            best_diff = float('inf')
-            for album in exact_matches:
-                release_date = album.get("release_date", "")
-                if release_date:
-                    try:
-                        album_year = int(release_date.split("-")[0])
-                        diff = abs(album_year - discogs_year)
-                        if diff <= 2 and diff < best_diff:
-                            best_diff = diff
-                            best_match = album
-                    except (ValueError, IndexError):
-                        pass
-            
-            if best_match:
-                return best_match.get("id"), best_match
+        # Heuristic 2: Prefer release year closest to Discogs year (±2 years)
+        year_diff = _album_year_diff(album, discogs_year) if discogs_year else None
+        year_rank = year_diff if year_diff is not None and year_diff <= 2 else 3
         
         # Heuristic 3: Prefer canonical/non-deluxe unless Discogs title clearly indicates deluxe
-        if exact_matches:
-            # Check if Discogs title has deluxe/special indicators
-            discogs_lower = album_title.lower()
-            has_deluxe_keywords = any(kw in discogs_lower for kw in ["deluxe", "special", "expanded", "remastered"])
-            
-            for album in exact_matches:
-                album_name_lower = album.get("name", "").lower()
-                # If Discogs doesn't have deluxe keywords, prefer non-deluxe
-                if not has_deluxe_keywords:
-                    if not any(kw in album_name_lower for kw in ["deluxe", "special edition", "expanded"]):
-                        return album.get("id"), album
-                # If Discogs has deluxe keywords, prefer matching deluxe
-                else:
-                    if any(kw in album_name_lower for kw in ["deluxe", "special", "expanded"]):
-                        return album.get("id"), album
-            
-            # Fallback: return first exact match
-            return exact_matches[0].get("id"), exact_matches[0]
+        # (only among matches without a close year; close-year ties keep Spotify's order)
+        if year_rank <= 2:
+            edition_penalty = 0
+        elif wants_deluxe:
+            edition_penalty = 0 if _SPOTIFY_DELUXE_RE.search(name) else 1
+        else:
+            edition_penalty = 1 if _SPOTIFY_NON_CANONICAL_RE.search(name) else 0
         
-        # No exact match, return first result
-        return albums[0].get("id"), albums[0]
+        score = (year_rank, edition_penalty, idx)
+        if best_score is None or score < best_score:
+            best_score, best_album = score, album
     
-    except Exception as e:
-        print(f"Spotify search error for album '{album_title}' by '{artist_name}': {e}")
+    if best_album:
+        return best_album.get("id"), best_album
+    
+    if exact_only:
         return None, None
+    
+    # No exact match, return first result
+    return albums[0].get("id"), albums[0]
 
 def spotify_search_track(track_title: str, artist_name: str, album_title: str = None, sp=None):
     """
     Search Spotify for track with fallback queries.
+    Outcomes (including misses) are cached on disk; a cached hit returns (track_uri, None).
     Returns (track_uri, track_data) or (None, None) if not found.
     """
     if not sp:
@@ -156,13 +243,19 @@ def spotify_search_track(track_title: str, artist_name: str, album_title: str =
     # Clean artist name to remove Discogs parenthetical numbering
     cleaned_artist = clean_artist_name_for_spotify(artist_name)
     
+    cache_key = spotify_cache_key(track_title, cleaned_artist, album_title)
+    found, track_uri = get_spotify_result("track", cache_key)
+    if found:
+        return track_uri, None
+    
     # Try with album first
     if album_title:
         query = f'track:"{track_title}" artist:"{cleaned_artist}" album:"{album_title}"'
         try:
-            results = sp.search(q=query, type="track", limit=5)
+            results = _spotify_call(sp.search, q=query, type="track", limit=5)
             tracks = results.get("tracks", {}).get("items", [])
             if tracks:
+                set_spotify_result("track", cache_key, tracks[0].get("uri"))
                 return tracks[0].get("uri"), tracks[0]
         except Exception:
             pass
@@ -170,43 +263,146 @@ def spotify_search_track(track_title: str, artist_name: str, album_title: str =
     # Fallback: just track + artist
     query = f'track:"{track_title}" artist:"{cleaned_artist}"'
     try:
-        results = sp.search(q=query, type="track", limit=5)
+        results = _spotify_call(sp.search, q=query, type="track", limit=5)
         tracks = results.get("tracks", {}).get("items", [])
         if tracks:
+            set_spotify_result("track", cache_key, tracks[0].get("uri"))
             return tracks[0].get("uri"), tracks[0]
+        set_spotify_result("track", cache_key, None)  # Remember the miss
     except Exception as e:
-        print(f"Spotify track search error for '{track_title}' by '{artist_name}': {e}")
+        log.info(f"Spotify track search error for '{track_title}' by '{artist_name}': {e}")
     
     return None, None
 
-def spotify_get_album_tracks(album_id: str, sp=None):
+_album_tracks_cache = {}  # album_id -> list of (track_name, track_uri)
+
+def spotify_get_album_track_items(album_id: str, sp=None):
     """
     Fetch all tracks from Spotify album (handle multi-disc).
-    Returns list of track URIs in order.
+    Results are memoized per album for the lifetime of the process.
+    Returns list of (track_name, track_uri) tuples in order.
     """
     if not sp or not album_id:
         return []
+    if album_id in _album_tracks_cache:
+        return _album_tracks_cache[album_id]
     
     try:
         tracks = []
-        results = sp.album_tracks(album_id, limit=50)
+        results = _spotify_call(sp.album_tracks, album_id, limit=50)
         
         while results:
             for item in results.get("items", []):
                 track_uri = item.get("uri")
                 if track_uri:
-                    tracks.append(track_uri)
+                    tracks.append((item.get("name", ""), track_uri))
             
             if results.get("next"):
-                results = sp.next(results)
+                results = _spotify_call(sp.next, results)
             else:
                 break
         
+        _album_tracks_cache[album_id] = tracks
         return tracks
     except Exception as e:
-        print(f"Failed to fetch tracks for album {album_id}: {e}")
+        log.info(f"Failed to fetch tracks for album {album_id}: {e}")
         return []
 
+def spotify_prefetch_album_tracks(album_ids, sp=None, batch_size=20):
+    """
+    Fetch tracklists for many albums with the bulk albums endpoint (up to 20 IDs per call)
+    and memoize them for spotify_get_album_track_items / spotify_get_album_tracks.
+    Albums with more than 50 tracks page through the remainder individually.
+    """
+    if not sp:
+        return
+    
+    pending = [aid for aid in dict.fromkeys(album_ids) if aid and aid not in _album_tracks_cache]
+    for i in range(0, len(pending), batch_size):
+        batch = pending[i:i + batch_size]
+        try:
+            results = _spotify_call(sp.albums, batch)
+        except Exception as e:
+            log.info(f"Failed to fetch album batch ({len(batch)} albums): {e}")
+            continue
+        
+        for album in results.get("albums", []):
+            if not album:
+                continue
+            tracks = []
+            page = album.get("tracks", {})
+            try:
+                while page:
+                    for item in page.get("items", []):
+                        if item.get("uri"):
+                            tracks.append((item.get("name", ""), item["uri"]))
+                    page = _spotify_call(sp.next, page) if page.get("next") else None
+            except Exception as e:
+                log.info(f"Failed to fetch tracks for album {album.get('id')}: {e}")
+                continue
+            _album_tracks_cache[album.get("id")] = tracks
+
+def spotify_get_album_tracks(album_id: str, sp=None):
+    """
+    Fetch all tracks from Spotify album (handle multi-disc).
+    Returns list of track URIs in order.
+    """
+    return [uri for _, uri in spotify_get_album_track_items(album_id, sp=sp)]
+
+# Drop "(Remastered 2011)", "[Live]", " - 2009 Remaster" style suffixes before comparing titles.
+# Only edition/version markers are stripped, so "Song - Part 2" or "Intro (Reprise)" keep their tails
+_VERSION_WORDS = r'(?:remaster(?:ed)?|live|mono|stereo|version|edition|bonus track)'
+_TITLE_SUFFIX_RE = re.compile(
+    r'\s*[\(\[][^\)\]]*\b' + _VERSION_WORDS + r'\b[^\)\]]*[\)\]]'
+    r'|\s+-\s+[^-]*\b' + _VERSION_WORDS + r'\b.*$'
+)
+_DIGITS_RE = re.compile(r'\d+')
+_MAX_CANDIDATE_ALBUMS = 3
+
+def _normalize_title(title: str) -> str:
+    return _TITLE_SUFFIX_RE.sub('', title.lower()).strip()
+
+def spotify_match_tracks_from_candidates(track_titles, album_title: str, candidates, sp=None,
+                                         album_cutoff: float = 0.6, track_cutoff: float = 0.85):
+    """
+    Match Discogs track titles against the tracklists of the artist's albums closest to album_title,
+    taken from an artist-scoped search (see spotify_search_artist_albums), without per-track searches.
+    Costs one album_tracks call per candidate album (at most 3) instead of up to two searches per track.
+    Fuzzy title matches must carry the same numbers ("Part 1" never matches "Part 2"), and each
+    Spotify track is matched to at most one title.
+    Returns dict mapping track title -> track URI for the titles that matched.
+    """
+    if not sp or not candidates or not track_titles:
+        return {}
+    
+    close_names = difflib.get_close_matches(album_title.lower(), list(candidates), n=3, cutoff=album_cutoff)
+    albums = [album for name in close_names for album in candidates[name]][:_MAX_CANDIDATE_ALBUMS]
+    by_name = {}
+    for album in albums:
+        for track_name, track_uri in spotify_get_album_track_items(album.get("id"), sp=sp):
+            by_name.setdefault(_normalize_title(track_name), track_uri)
+    if not by_name:
+        return {}
+    
+    matched = {}
+    used_uris = set()
+    for title in track_titles:
+        normalized = _normalize_title(title)
+        close = difflib.get_close_matches(normalized, list(by_name), n=1, cutoff=track_cutoff)
+        if not close or _DIGITS_RE.findall(close[0]) != _DIGITS_RE.findall(normalized):
+            continue
+        track_uri = by_name[close[0]]
+        if track_uri not in used_uris:
+            used_uris.add(track_uri)
+            matched[title] = track_uri
+    return matched
+
+# Bare 22-char ID, spotify:playlist:{id}, or open.spotify.com/[intl-xx/]playlist/{id}[?si=...]
+_PLAYLIST_ID_RE = re.compile(
+    r'(?:spotify:playlist:|(?:https?://)?open\.spotify\.com/(?:[^/?#]+/)*playlist/)?'
+    r'([A-Za-z0-9_-]{22})(?:[/?#&].*)?'
+)
+
 def spotify_extract_playlist_id(url: str) -> str:
     """
     Extract playlist ID from Spotify URL or URI.
@@ -219,29 +415,8 @@ def spotify_extract_playlist_id(url: str) -> str:
     if not url:
         return None
     
-    url = url.strip()
-    
-    # Direct playlist ID (alphanumeric, 22 chars typically)
-    if len(url) == 22 and url.replace('-', '').replace('_', '').isalnum():
-        return url
-    
-    # Handle spotify:playlist:{id} format
-    if url.startswith("spotify:playlist:"):
-        playlist_id = url.replace("spotify:playlist:", "").split("?")[0]
-        return playlist_id if playlist_id else None
-    
-    # Handle https://open.spotify.com/playlist/{id} format
-    if "open.spotify.com/playlist/" in url:
-        try:
-            # Extract ID from URL (may have query params or track info)
-            parts = url.split("/playlist/")
-            if len(parts) > 1:
-                playlist_id = parts[1].split("?")[0].split("&")[0]
-                return playlist_id if playlist_id else None
-        except Exception:
-            pass
-    
-    return None
+    m = _PLAYLIST_ID_RE.fullmatch(url.strip())
+    return m.group(1) if m else None
 
 def spotify_get_playlist_tracks(playlist_id: str, sp=None):
     """
@@ -254,24 +429,24 @@ def spotify_get_playlist_tracks(playlist_id: str, sp=None):
     
     try:
         track_uris = set()
-        results = sp.playlist_tracks(playlist_id, limit=100)
+        # Only the track URIs are needed; skip album art, artists, markets, etc. in each page
+        results = _spotify_call(sp.playlist_items, playlist_id, limit=100,
+                                fields="items(track(uri)),next", additional_types=("track",))
         
         while results:
-            for item in results.get("items", []):
-                track = item.get("track")
-                if track:
-                    track_uri = track.get("uri")
-                    if track_uri:
-                        track_uris.add(track_uri)
+            track_uris.update(
+                item["track"]["uri"] for item in results.get("items", [])
+                if item.get("track") and item["track"].get("uri")
+            )
             
             if results.get("next"):
-                results = sp.next(results)
+                results = _spotify_call(sp.next, results)
             else:
                 break
         
         return track_uris
     except Exception as e:
-        print(f"Failed to fetch tracks from playlist {playlist_id}: {e}")
+        log.info(f"Failed to fetch tracks from playlist {playlist_id}: {e}")
         return set()
 
 def spotify_create_playlist(name: str, description: str, public: bool = False, sp=None):
@@ -283,8 +458,8 @@ def spotify_create_playlist(name: str, description: str, public: bool = False, s
         return None, None
     
     try:
-        user_id = sp.current_user()["id"]
-        playlist = sp.user_playlist_create(
+        user_id = _spotify_call(sp.current_user)["id"]
+        playlist = _spotify_call(sp.user_playlist_create,
             user=user_id,
             name=name,
             public=public,
@@ -294,7 +469,7 @@ def spotify_create_playlist(name: str, description: str, public: bool = False, s
         playlist_url = playlist.get("external_urls", {}).get("spotify", "")
         return playlist_id, playlist_url
     except Exception as e:
-        print(f"Failed to create playlist '{name}': {e}")
+        log.info(f"Failed to create playlist '{name}': {e}")
         return None, None
 
 def spotify_add_tracks_to_playlist(playlist_id: str, track_uris: list, sp=None):
@@ -311,11 +486,10 @@ def spotify_add_tracks_to_playlist(playlist_id: str, track_uris: list, sp=None):
     for i in range(0, len(track_uris), batch_size):
         batch = track_uris[i:i + batch_size]
         try:
-            sp.playlist_add_items(playlist_id, batch)
+            _spotify_call(sp.playlist_add_items, playlist_id, batch)
             added += len(batch)
-            time.sleep(0.2)  # Rate limiting
         except Exception as e:
-            print(f"Failed to add batch to playlist {playlist_id}: {e}")
+            log.info(f"Failed to add batch to playlist {playlist_id}: {e}")
     
     return added
 
@@ -0,0 +1,77 @@
+"""
+Spotify search caching module.
+Persists album/track search outcomes to disk (including misses) so re-runs and overlapping
+folders don't repeat searches that were already answered.
+"""
+
+import os
+import time
+import threading
+from fast_json import json_loads, json_dumps
+
+SPOTIFY_CACHE_FILE = "spotify_search_cache.json"
+SPOTIFY_CACHE_TTL = 30 * 24 * 60 * 60  # 30 days for matches
+SPOTIFY_MISS_TTL = 7 * 24 * 60 * 60    # 7 days for misses (the catalog keeps growing)
+
+_cache = None
+_lock = threading.Lock()
+
+def load_spotify_cache():
+    """Load previously saved Spotify search results from JSON file (once per process)."""
+    global _cache
+    if _cache is not None:
+        return _cache
+    with _lock:
+        if _cache is not None:
+            return _cache
+        cache = {}
+        if os.path.exists(SPOTIFY_CACHE_FILE):
+            try:
+                with open(SPOTIFY_CACHE_FILE, 'rb') as f:
+                    cache = json_loads(f.read())
+            except Exception as e:
+                print(f"Warning: Could not load Spotify search cache: {e}. Starting fresh.")
+                cache = {}
+        _cache = cache
+    return _cache
+
+def _expired(ts, value, now):
+    return now - ts > (SPOTIFY_CACHE_TTL if value is not None else SPOTIFY_MISS_TTL)
+
+def save_spotify_cache():
+    """Save Spotify search results to JSON file (atomically), dropping expired entries."""
+    if _cache is None:
+        return
+    now = time.time()
+    with _lock:
+        for key in [k for k, (ts, value) in _cache.items() if _expired(ts, value, now)]:
+            del _cache[key]
+        data = json_dumps(_cache)
+    tmp_path = SPOTIFY_CACHE_FILE + ".tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(tmp_path, SPOTIFY_CACHE_FILE)
+    except Exception as e:
+        print(f"Warning: Could not save Spotify search cache: {e}")
+
+def spotify_cache_key(*parts):
+    """Normalized cache key from title/artist/year parts."""
+    return "|".join(str(p).lower().strip() if p is not None else "" for p in parts)
+
+def get_spotify_result(kind, key):
+    """
+    Get a cached search outcome (e.g. kind='album', key=spotify_cache_key(title, artist, year)).
+    Returns (found, value); value is None for a cached miss.
+    """
+    entry = load_spotify_cache().get(f"{kind}:{key}")
+    if not entry:
+        return False, None
+    ts, value = entry
+    if _expired(ts, value, time.time()):
+        return False, None
+    return True, value
+
+def set_spotify_result(kind, key, value):
+    """Store a search outcome (None records a miss) with the current timestamp."""
+    load_spotify_cache()[f"{kind}:{key}"] = [time.time(), value]
@@ -5,14 +5,14 @@ or adding tracks to an existing playlist.
 """
 
 import os
-import time
-import pandas as pd
+import logging
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import config
 from config import (
     DISCOGS_USER, DISCOGS_TOKEN,
-    DISCOGS_PLAYLIST_SOURCE_FOLDER, SPOTIFY_PLAYLIST_URL
+    DISCOGS_PLAYLIST_SOURCE_FOLDER, SPOTIFY_PLAYLIST_URL, SPOTIFY_CONCURRENCY
 )
 from discogs_api import (
     discogs_get_collection_folders_with_names,
@@ -26,10 +26,333 @@ from spotify_api import (
     spotify_create_playlist,
     spotify_add_tracks_to_playlist,
     spotify_search_album,
+    spotify_search_artist_albums,
+    clean_artist_name_for_spotify,
     spotify_get_album_tracks,
+    spotify_prefetch_album_tracks,
+    spotify_match_tracks_from_candidates,
     spotify_search_track
 )
-from helpers import get_folders_from_gcs_prefix
+from discogs_cache import save_discogs_cache
+from spotify_cache import save_spotify_cache
+from helpers import get_folders_from_gcs_prefix, write_dicts_csv
+
+log = logging.getLogger(__name__)
+
+UNMATCHED_ALBUM_FIELDS = ["folder_name", "discogs_release_id", "discogs_url", "album_title", "artist_name", "notes"]
+UNMATCHED_TRACK_FIELDS = ["folder_name", "discogs_release_id", "discogs_url", "album_title", "artist_name",
+                          "track_title", "track_position", "notes"]
+
+
+def prefetch_artist_albums(releases, sp):
+    """
+    Run one artist-scoped Spotify album search per artist that has several releases.
+    Returns dict mapping lowercased cleaned artist name -> albums_by_name dict
+    (see spotify_search_artist_albums). Artists with a single release are skipped,
+    since a direct album search is just as cheap for them.
+    """
+    counts = {}
+    for release in releases:
+        artist_key = clean_artist_name_for_spotify(release.artist_name or "").lower()
+        if artist_key:
+            counts[artist_key] = counts.get(artist_key, 0) + 1
+
+    artists = {}  # artist_key -> first-seen artist name
+    for release in releases:
+        artist_name = release.artist_name
+        artist_key = clean_artist_name_for_spotify(artist_name or "").lower()
+        if counts.get(artist_key, 0) >= 2:
+            artists.setdefault(artist_key, artist_name)
+
+    with ThreadPoolExecutor(max_workers=SPOTIFY_CONCURRENCY) as executor:
+        results = executor.map(
+            lambda item: spotify_search_artist_albums(item[1], min_results=counts[item[0]] * 2, sp=sp),
+            artists.items()
+        )
+        return dict(zip(artists, results))
+
+
+def select_playlist_folders():
+    """
+    Decide which Discogs folders to build playlists from.
+    Precedence: --input-prefix (GCS folders), then DISCOGS_PLAYLIST_SOURCE_FOLDER, then all custom folders.
+    Returns (folders_to_process, prefix_was_customized); folders_to_process is a list of
+    (folder_id, folder_name) tuples, or None if there is nothing to process.
+    """
+    folders_dict = discogs_get_collection_folders_with_names(DISCOGS_USER)
+    folders_to_process = []
+
+    # Check if INPUT_PREFIX was customized (different from default)
+    default_prefix = os.getenv("VINYL_INPUT_PREFIX", "covers/").strip()
+    prefix_was_customized = config.INPUT_PREFIX != default_prefix
+
+    # If INPUT_PREFIX was customized, filter folders based on GCS structure
+    gcs_folder_names = set()
+    if prefix_was_customized:
+        log.info(f"\nINPUT_PREFIX was customized to: {config.INPUT_PREFIX}")
+        log.info("Extracting folder names from GCS paths...")
+        gcs_folder_names = get_folders_from_gcs_prefix(config.INPUT_PREFIX)
+        if gcs_folder_names:
+            log.info(f"Found folders in GCS: {', '.join(sorted(gcs_folder_names))}")
+        else:
+            log.warning("No folders found in GCS under the specified prefix.")
+
+    # If INPUT_PREFIX was customized via --input-prefix, it takes precedence over DISCOGS_PLAYLIST_SOURCE_FOLDER
+    if prefix_was_customized:
+        # Process only folders found in GCS under the specified prefix (ignore DISCOGS_PLAYLIST_SOURCE_FOLDER)
+        if gcs_folder_names:
+            log.info(f"\n--input-prefix takes precedence. Processing folders found in GCS: {', '.join(sorted(gcs_folder_names))}")
+            for name in sorted(gcs_folder_names):
+                if name in folders_dict:
+                    folders_to_process.append((folders_dict[name], name))
+        else:
+            log.warning(f"No folders found in GCS under prefix '{config.INPUT_PREFIX}'. Nothing to process.")
+            return None, prefix_was_customized
+    elif DISCOGS_PLAYLIST_SOURCE_FOLDER:
+        # Single folder mode (only when --input-prefix is NOT set)
+        # Case-insensitive index; reversed so the first folder wins if two names differ only by case
+        folders_by_lower = {name.lower(): (fid, name) for name, fid in reversed(list(folders_dict.items()))}
+        entry = folders_by_lower.get(DISCOGS_PLAYLIST_SOURCE_FOLDER.lower())
+        if entry:
+            folders_to_process.append(entry)
+        else:
+            log.error(f"Folder '{DISCOGS_PLAYLIST_SOURCE_FOLDER}' not found in your Discogs collection.")
+            log.info(f"Available folders: {', '.join(folders_dict.keys())}")
+            return None, prefix_was_customized
+    else:
+        # Multi-folder mode: process all custom folders (IDs >= 2)
+        for name, folder_id in folders_dict.items():
+            if folder_id >= 2:  # Skip system folders (0 = All, 1 = Uncategorized)
+                folders_to_process.append((folder_id, name))
+
+    if not folders_to_process:
+        log.info("No folders to process.")
+        return None, prefix_was_customized
+    return folders_to_process, prefix_was_customized
+
+
+def fetch_folder_releases(folders_to_process, max_workers=4):
+    """
+    Fetch the releases of every selected folder before any Spotify work starts.
+    Folders are listed concurrently; the shared Discogs rate limiter keeps the combined rate in bounds.
+    Returns a list of (folder_id, folder_name, releases) tuples in folder order.
+    """
+    log.info(f"Fetching releases from {len(folders_to_process)} folder(s)...")
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        all_releases = list(executor.map(
+            lambda folder: discogs_list_folder_releases(DISCOGS_USER, folder[0]), folders_to_process
+        ))
+
+    folder_releases = []
+    for (folder_id, folder_name), releases in zip(folders_to_process, all_releases):
+        log.info(f"Found {len(releases)} releases in folder '{folder_name}' (ID: {folder_id})")
+        folder_releases.append((folder_id, folder_name, releases))
+    return folder_releases
+
+
+def album_key(release):
+    """De-duplication key for a Discogs release: (album_title_lower, artist_name_lower)."""
+    return (release.album_title.lower(), release.artist_name.lower())
+
+
+def match_release_on_spotify(release, sp, candidates=None):
+    """
+    Match one Discogs release on Spotify: album-level first, then track-level fallback.
+    Returns a dict with:
+        album_matched: True if the album itself was found
+        track_uris: matched track URIs in album order
+        unmatched_tracks: list of (track_title, track_position) not found during the fallback
+        notes: reason the album counts as unmatched, or None if any tracks were found
+        messages: progress lines, logged together by the caller so concurrent matches don't interleave
+    """
+    album_title = release.album_title
+    artist_name = release.artist_name
+    result = {"album_matched": False, "track_uris": [], "unmatched_tracks": [], "notes": None, "messages": []}
+    progress = result["messages"].append
+
+    # Try album-level match
+    album_id, album_data = spotify_search_album(album_title, artist_name, release.year, sp=sp, candidates=candidates)
+
+    if album_id:
+        # Album matched - get all tracks
+        progress(f"  ✓ Album matched on Spotify")
+        album_tracks = spotify_get_album_tracks(album_id, sp=sp)
+
+        if album_tracks:
+            result["album_matched"] = True
+            result["track_uris"] = album_tracks
+            progress(f"  Found {len(album_tracks)} tracks from album")
+        else:
+            progress(f"  Warning: Album matched but no tracks found")
+            result["notes"] = "Album matched but no tracks available"
+        return result
+
+    # Album not matched - try track-level fallback
+    progress(f"  Album not found, trying track-level matching...")
+    tracklist = discogs_get_release_tracklist(release.release_id)
+
+    if not tracklist:
+        progress(f"  No tracklist available on Discogs")
+        result["notes"] = "Album not found, no tracklist available"
+        return result
+
+    # Match against the artist's album tracklists first; only search Spotify per track on a miss
+    if candidates is None:
+        candidates = spotify_search_artist_albums(artist_name, sp=sp)
+    track_titles = [track.get("title", "").strip() for track in tracklist]
+    local_matches = spotify_match_tracks_from_candidates([t for t in track_titles if t], album_title, candidates, sp=sp)
+
+    seen_uris = set()  # Repeated titles or searches landing on the same track add it only once
+    for track, track_title in zip(tracklist, track_titles):
+        if not track_title:
+            continue
+
+        track_uri = local_matches.get(track_title)
+        if not track_uri:
+            track_uri, _ = spotify_search_track(track_title, artist_name, album_title, sp=sp)
+        if track_uri:
+            if track_uri not in seen_uris:
+                seen_uris.add(track_uri)
+                result["track_uris"].append(track_uri)
+        else:
+            result["unmatched_tracks"].append((track_title, track.get("position", "")))
+
+    if result["track_uris"]:
+        progress(f"  ✓ Matched {len(result['track_uris'])}/{len(tracklist)} tracks")
+    else:
+        result["notes"] = "Album not found, no tracks matched"
+        progress(f"  ✗ No tracks matched")
+    return result
+
+
+def match_unique_albums(folder_releases, sp):
+    """
+    Match every distinct album across all folders on Spotify exactly once.
+    An album that sits in several folders shares one set of search/track lookups.
+    Returns dict mapping Discogs release_id -> result from match_release_on_spotify
+    (releases of the same album share one result, tagged with its "album_key").
+    """
+    unique_releases = {}  # album_key -> first release seen for that album
+    release_keys = {}     # release_id -> album_key
+    for _, _, releases in folder_releases:
+        for release in releases:
+            release_id = release.release_id
+            if release_id in release_keys:
+                continue  # Same release in another folder: no string work needed
+            key = album_key(release)  # Secondary dedup: distinct releases of the same album
+            release_keys[release_id] = key
+            unique_releases.setdefault(key, release)
+
+    total = sum(len(releases) for _, _, releases in folder_releases)
+    log.info(f"\nMatching {len(unique_releases)} unique albums on Spotify "
+          f"({total - len(unique_releases)} duplicates skipped)...")
+
+    # Batch album lookups: one artist-scoped search per repeated artist
+    artist_albums = prefetch_artist_albums(list(unique_releases.values()), sp)
+
+    def candidates_for(release):
+        return artist_albums.get(clean_artist_name_for_spotify(release.artist_name or "").lower())
+
+    def search(release):
+        album_id, _ = spotify_search_album(release.album_title, release.artist_name, release.year,
+                                           sp=sp, candidates=candidates_for(release))
+        return album_id
+
+    def match(release):
+        return match_release_on_spotify(release, sp, candidates=candidates_for(release))
+
+    # Matching is network-bound: overlap releases, paced by the shared Spotify/Discogs rate limiters
+    album_matches = {}
+    with ThreadPoolExecutor(max_workers=SPOTIFY_CONCURRENCY) as executor:
+        # Resolve album IDs first so tracklists can be fetched 20 albums per request;
+        # the per-release pass below then reads both from the search and tracklist caches
+        album_ids = list(executor.map(search, unique_releases.values()))
+        spotify_prefetch_album_tracks(album_ids, sp=sp)
+
+        futures = {executor.submit(match, release): key for key, release in unique_releases.items()}
+        total_unique = len(unique_releases)
+        for idx, future in enumerate(as_completed(futures), 1):
+            key = futures[future]
+            result = future.result()
+            if log.isEnabledFor(logging.INFO):
+                release = unique_releases[key]
+                # One write per release instead of one per progress line
+                log.info("\n".join([f"\n[{idx}/{total_unique}] {release.artist_name} - {release.album_title}",
+                                    *result["messages"]]))
+            result["album_key"] = key
+            album_matches[key] = result
+    return {release_id: album_matches[key] for release_id, key in release_keys.items()}
+
+
+def tally_folder_matches(folder_name, releases, matches, seen, unmatched_albums, unmatched_tracks):
+    """
+    Attribute pre-computed Spotify matches to one folder, in the folder's release order.
+    seen holds release IDs and album keys already tallied; those releases are skipped.
+    Unmatched rows are appended for this folder.
+    Returns (track_uris, album_matches, partial_matches, unmatched_count).
+    """
+    track_uris = []
+    album_matches = 0
+    partial_matches = 0
+    unmatched_count = 0
+
+    for release in releases:
+        release_id = release.release_id
+        if release_id in seen:
+            continue
+        seen.add(release_id)
+        match = matches[release_id]
+        if match["album_key"] in seen:
+            continue
+        seen.add(match["album_key"])
+
+        release_info = {
+            "folder_name": folder_name,
+            "discogs_release_id": release_id,
+            "discogs_url": release.discogs_url,
+            "album_title": release.album_title,
+            "artist_name": release.artist_name,
+        }
+        for track_title, track_position in match["unmatched_tracks"]:
+            unmatched_tracks.append({
+                **release_info,
+                "track_title": track_title,
+                "track_position": track_position,
+                "notes": "Track not found on Spotify"
+            })
+
+        if match["notes"]:
+            unmatched_count += 1
+            unmatched_albums.append({**release_info, "notes": match["notes"]})
+        elif match["album_matched"]:
+            track_uris.extend(match["track_uris"])
+            album_matches += 1
+        else:
+            track_uris.extend(match["track_uris"])
+            partial_matches += 1
+
+    return track_uris, album_matches, partial_matches, unmatched_count
+
+
+def write_unmatched_csvs(unmatched_albums, unmatched_tracks):
+    """
+    Write unmatched albums and tracks to CSV for manual review.
+    """
+    if unmatched_albums:
+        unmatched_csv = "unmatched_albums.csv"
+        write_dicts_csv(unmatched_csv, unmatched_albums, UNMATCHED_ALBUM_FIELDS)
+        log.info(f"\nWrote {len(unmatched_albums)} unmatched albums to {unmatched_csv}")
+        log.info("You can manually review and add these to Spotify later.")
+    else:
+        log.info("\nAll albums were matched successfully!")
+
+    if unmatched_tracks:
+        unmatched_tracks_csv = "unmatched_tracks.csv"
+        write_dicts_csv(unmatched_tracks_csv, unmatched_tracks, UNMATCHED_TRACK_FIELDS)
+        log.info(f"\nWrote {len(unmatched_tracks)} unmatched tracks to {unmatched_tracks_csv}")
+        log.info("You can manually review and add these to Spotify later.")
+    else:
+        log.info("\nAll tracks were matched successfully!")
 
 
 def build_spotify_playlists():
@@ -37,532 +360,179 @@ def build_spotify_playlists():
     Main orchestration function for building Spotify playlists from Discogs collection folders.
     """
     # Review gate
-    print("\n" + "="*80)
-    print("Discogs is now the source of truth.")
+    log.info("\n" + "="*80)
+    log.info("Discogs is now the source of truth.")
     response = input("Do you want to proceed to build Spotify playlists?\nPress Enter to continue, or type 'skip' to stop here: ").strip()
-    
+
     if response.lower() == "skip":
-        print("Skipping Spotify playlist building.")
+        log.info("Skipping Spotify playlist building.")
         return
-    
+
     # Check if Spotify credentials are available
-    if not all([os.environ.get("SPOTIPY_CLIENT_ID"), 
-                os.environ.get("SPOTIPY_CLIENT_SECRET"), 
+    if not all([os.environ.get("SPOTIPY_CLIENT_ID"),
+                os.environ.get("SPOTIPY_CLIENT_SECRET"),
                 os.environ.get("SPOTIPY_REDIRECT_URI")]):
-        print("Spotify credentials not set. Skipping playlist building.")
-        print("Set SPOTIPY_CLIENT_ID, SPOTIPY_CLIENT_SECRET, and SPOTIPY_REDIRECT_URI to enable playlist building.")
+        log.info("Spotify credentials not set. Skipping playlist building.")
+        log.info("Set SPOTIPY_CLIENT_ID, SPOTIPY_CLIENT_SECRET, and SPOTIPY_REDIRECT_URI to enable playlist building.")
         return
-    
+
     # Authenticate with Spotify
-    print("\nAuthenticating with Spotify...")
+    log.info("\nAuthenticating with Spotify...")
     try:
         sp = spotify_authenticate()
-        print("Spotify authentication successful.")
+        log.info("Spotify authentication successful.")
     except SystemExit as e:
-        print(f"Spotify authentication failed: {e}")
+        log.info(f"Spotify authentication failed: {e}")
         return
     except Exception as e:
-        print(f"Unexpected error during Spotify authentication: {e}")
+        log.info(f"Unexpected error during Spotify authentication: {e}")
         return
-    
+
     # Check if existing playlist URL is provided
     if SPOTIFY_PLAYLIST_URL:
         # Use existing playlist mode - skip folder-based creation
         playlist_id = spotify_extract_playlist_id(SPOTIFY_PLAYLIST_URL)
         if not playlist_id:
-            print(f"Error: Invalid Spotify playlist URL: {SPOTIFY_PLAYLIST_URL}")
-            print("Supported formats:")
-            print("  - https://open.spotify.com/playlist/{id}")
-            print("  - spotify:playlist:{id}")
-            print("  - Direct playlist ID")
+            log.error(f"Invalid Spotify playlist URL: {SPOTIFY_PLAYLIST_URL}")
+            log.info("Supported formats:")
+            log.info("  - https://open.spotify.com/playlist/{id}")
+            log.info("  - spotify:playlist:{id}")
+            log.info("  - Direct playlist ID")
             return
-        
-        print(f"\nUsing existing playlist: {SPOTIFY_PLAYLIST_URL}")
-        print(f"Extracted playlist ID: {playlist_id}")
-        
+
+        log.info(f"\nUsing existing playlist: {SPOTIFY_PLAYLIST_URL}")
+        log.info(f"Extracted playlist ID: {playlist_id}")
+
         # Fetch existing tracks from playlist
-        print("Fetching existing tracks from playlist...")
+        log.info("Fetching existing tracks from playlist...")
         existing_playlist_tracks = spotify_get_playlist_tracks(playlist_id, sp=sp)
-        print(f"Found {len(existing_playlist_tracks)} existing tracks in playlist")
-        
-        # Determine folders to process
-        if not DISCOGS_USER or not DISCOGS_TOKEN:
-            print("DISCOGS_USER or DISCOGS_TOKEN not set. Cannot fetch collection folders.")
-            return
-        
-        folders_dict = discogs_get_collection_folders_with_names(DISCOGS_USER)
-        folders_to_process = []
-        
-        # Check if INPUT_PREFIX was customized (different from default)
-        default_prefix = os.getenv("VINYL_INPUT_PREFIX", "covers/").strip()
-        prefix_was_customized = config.INPUT_PREFIX != default_prefix
-        
-        # If INPUT_PREFIX was customized, filter folders based on GCS structure
-        gcs_folder_names = set()
-        if prefix_was_customized:
-            print(f"\nINPUT_PREFIX was customized to: {config.INPUT_PREFIX}")
-            print("Extracting folder names from GCS paths...")
-            gcs_folder_names = get_folders_from_gcs_prefix(config.INPUT_PREFIX)
-            if gcs_folder_names:
-                print(f"Found folders in GCS: {', '.join(sorted(gcs_folder_names))}")
-            else:
-                print("Warning: No folders found in GCS under the specified prefix.")
-        
-        # If INPUT_PREFIX was customized via --input-prefix, it takes precedence over DISCOGS_PLAYLIST_SOURCE_FOLDER
-        if prefix_was_customized:
-            # Process only folders found in GCS under the specified prefix (ignore DISCOGS_PLAYLIST_SOURCE_FOLDER)
-            if gcs_folder_names:
-                print(f"\n--input-prefix takes precedence. Processing folders found in GCS: {', '.join(sorted(gcs_folder_names))}")
-                for name, folder_id in folders_dict.items():
-                    if name in gcs_folder_names:
-                        folders_to_process.append((folder_id, name))
-            else:
-                print(f"Warning: No folders found in GCS under prefix '{config.INPUT_PREFIX}'. Nothing to process.")
-                return
-        elif DISCOGS_PLAYLIST_SOURCE_FOLDER:
-            # Single folder mode (only when --input-prefix is NOT set)
-            folder_name_lower = DISCOGS_PLAYLIST_SOURCE_FOLDER.lower()
-            folder_id = None
-            for name, fid in folders_dict.items():
-                if name.lower() == folder_name_lower:
-                    folder_id = fid
-                    folders_to_process.append((fid, name))
-                    break
-            
-            if not folder_id:
-                print(f"Error: Folder '{DISCOGS_PLAYLIST_SOURCE_FOLDER}' not found in your Discogs collection.")
-                print(f"Available folders: {', '.join(folders_dict.keys())}")
-                return
-        else:
-            # Multi-folder mode: process all custom folders (IDs >= 2)
-            for name, folder_id in folders_dict.items():
-                if folder_id >= 2:  # Skip system folders (0 = All, 1 = Uncategorized)
-                    folders_to_process.append((folder_id, name))
-        
-        if not folders_to_process:
-            print("No folders to process.")
-            return
-        
-        # Print which folders will be processed
-        folder_names = [name for _, name in folders_to_process]
-        if prefix_was_customized:
-            print(f"\nProcessing {len(folders_to_process)} folder(s) from GCS prefix '{config.INPUT_PREFIX}' and adding tracks to existing playlist...")
-            print(f"Folders: {', '.join(folder_names)}")
-            if DISCOGS_PLAYLIST_SOURCE_FOLDER:
-                print(f"Note: --input-prefix takes precedence over DISCOGS_PLAYLIST_SOURCE_FOLDER='{DISCOGS_PLAYLIST_SOURCE_FOLDER}'")
-        elif DISCOGS_PLAYLIST_SOURCE_FOLDER:
-            print(f"\nProcessing folder '{DISCOGS_PLAYLIST_SOURCE_FOLDER}' and adding tracks to existing playlist...")
-        else:
-            print(f"\nProcessing {len(folders_to_process)} folder(s) and adding tracks to existing playlist...")
-            print(f"Folders: {', '.join(folder_names)}")
-        print("Only tracks that don't already exist in the playlist will be added.")
-        
-        # Track unmatched albums and tracks for CSV output
-        unmatched_albums = []
-        unmatched_tracks = []
+        log.info(f"Found {len(existing_playlist_tracks)} existing tracks in playlist")
+
+    # Determine folders to process
+    if not DISCOGS_USER or not DISCOGS_TOKEN:
+        log.info("DISCOGS_USER or DISCOGS_TOKEN not set. Cannot fetch collection folders.")
+        return
+
+    folders_to_process, prefix_was_customized = select_playlist_folders()
+    if not folders_to_process:
+        return
+
+    # Print which folders will be processed
+    folder_names = [name for _, name in folders_to_process]
+    if not SPOTIFY_PLAYLIST_URL:
+        log.info(f"\nProcessing {len(folders_to_process)} folder(s)...")
+    elif prefix_was_customized:
+        log.info(f"\nProcessing {len(folders_to_process)} folder(s) from GCS prefix '{config.INPUT_PREFIX}' and adding tracks to existing playlist...")
+        log.info(f"Folders: {', '.join(folder_names)}")
+        if DISCOGS_PLAYLIST_SOURCE_FOLDER:
+            log.info(f"Note: --input-prefix takes precedence over DISCOGS_PLAYLIST_SOURCE_FOLDER='{DISCOGS_PLAYLIST_SOURCE_FOLDER}'")
+    elif DISCOGS_PLAYLIST_SOURCE_FOLDER:
+        log.info(f"\nProcessing folder '{DISCOGS_PLAYLIST_SOURCE_FOLDER}' and adding tracks to existing playlist...")
+    else:
+        log.info(f"\nProcessing {len(folders_to_process)} folder(s) and adding tracks to existing playlist...")
+        log.info(f"Folders: {', '.join(folder_names)}")
+    if SPOTIFY_PLAYLIST_URL:
+        log.info("Only tracks that don't already exist in the playlist will be added.")
+
+    # Fetch every folder up front so each distinct album is matched on Spotify only once
+    folder_releases = fetch_folder_releases(folders_to_process)
+    matches = match_unique_albums(folder_releases, sp)
+    save_discogs_cache()
+    save_spotify_cache()
+
+    # Track unmatched albums and tracks for CSV output
+    unmatched_albums = []
+    unmatched_tracks = []
+
+    if SPOTIFY_PLAYLIST_URL:
         all_new_tracks = []  # Collect all tracks from all folders
-        seen_albums = set()  # De-duplication across all folders
-        
-        # Process each folder and collect tracks
-        for folder_id, folder_name in folders_to_process:
-            print(f"\n{'='*80}")
-            print(f"Processing folder: {folder_name} (ID: {folder_id})")
-            print(f"{'='*80}")
-            
-            # Fetch releases from folder
-            print(f"Fetching releases from folder '{folder_name}'...")
-            releases = discogs_list_folder_releases(DISCOGS_USER, folder_id)
-            print(f"Found {len(releases)} releases in folder '{folder_name}'")
-            
+        seen = set()  # De-duplication across all folders (release IDs and album keys)
+
+        for folder_id, folder_name, releases in folder_releases:
             if not releases:
                 continue
-            
-            # Track statistics for this folder
-            album_matches = 0
-            partial_matches = 0
-            unmatched_count = 0
-            
-            # Process each release
-            for idx, release in enumerate(releases, 1):
-                release_id = release["release_id"]
-                album_title = release["album_title"]
-                artist_name = release["artist_name"]
-                year = release.get("year")
-                discogs_url = release["discogs_url"]
-                
-                print(f"\n[{idx}/{len(releases)}] {artist_name} - {album_title}")
-                
-                # Skip if we've already processed this album (de-duplication)
-                album_key = (album_title.lower(), artist_name.lower())
-                if album_key in seen_albums:
-                    print(f"  Skipping duplicate album")
-                    continue
-                seen_albums.add(album_key)
-                
-                # Try album-level match
-                album_id, album_data = spotify_search_album(album_title, artist_name, year, sp=sp)
-                
-                if album_id:
-                    # Album matched - get all tracks
-                    print(f"  ✓ Album matched on Spotify")
-                    album_tracks = spotify_get_album_tracks(album_id, sp=sp)
-                    
-                    if album_tracks:
-                        all_new_tracks.extend(album_tracks)
-                        album_matches += 1
-                        print(f"  Found {len(album_tracks)} tracks from album")
-                    else:
-                        print(f"  Warning: Album matched but no tracks found")
-                        unmatched_count += 1
-                        unmatched_albums.append({
-                            "folder_name": folder_name,
-                            "discogs_release_id": release_id,
-                            "discogs_url": discogs_url,
-                            "album_title": album_title,
-                            "artist_name": artist_name,
-                            "notes": "Album matched but no tracks available"
-                        })
-                else:
-                    # Album not matched - try track-level fallback
-                    print(f"  Album not found, trying track-level matching...")
-                    tracklist = discogs_get_release_tracklist(release_id)
-                    
-                    if not tracklist:
-                        print(f"  No tracklist available on Discogs")
-                        unmatched_count += 1
-                        unmatched_albums.append({
-                            "folder_name": folder_name,
-                            "discogs_release_id": release_id,
-                            "discogs_url": discogs_url,
-                            "album_title": album_title,
-                            "artist_name": artist_name,
-                            "notes": "Album not found, no tracklist available"
-                        })
-                        continue
-                    
-                    matched_tracks = []
-                    for track in tracklist:
-                        track_title = track.get("title", "").strip()
-                        if not track_title:
-                            continue
-                        
-                        track_uri, _ = spotify_search_track(track_title, artist_name, album_title, sp=sp)
-                        if track_uri:
-                            matched_tracks.append(track_uri)
-                        else:
-                            # Track not matched - add to unmatched tracks list
-                            unmatched_tracks.append({
-                                "folder_name": folder_name,
-                                "discogs_release_id": release_id,
-                                "discogs_url": discogs_url,
-                                "album_title": album_title,
-                                "artist_name": artist_name,
-                                "track_title": track_title,
-                                "track_position": track.get("position", ""),
-                                "notes": "Track not found on Spotify"
-                            })
-                    
-                    if matched_tracks:
-                        all_new_tracks.extend(matched_tracks)
-                        partial_matches += 1
-                        print(f"  ✓ Matched {len(matched_tracks)}/{len(tracklist)} tracks")
-                    else:
-                        unmatched_count += 1
-                        unmatched_albums.append({
-                            "folder_name": folder_name,
-                            "discogs_release_id": release_id,
-                            "discogs_url": discogs_url,
-                            "album_title": album_title,
-                            "artist_name": artist_name,
-                            "notes": "Album not found, no tracks matched"
-                        })
-                        print(f"  ✗ No tracks matched")
-                
-                time.sleep(0.3)  # Rate limiting between releases
-            
+
+            folder_tracks, album_matches, partial_matches, unmatched_count = tally_folder_matches(
+                folder_name, releases, matches, seen, unmatched_albums, unmatched_tracks
+            )
+            all_new_tracks.extend(folder_tracks)
+
             # Summary for this folder
-            print(f"\n{'='*80}")
-            print(f"Folder '{folder_name}' Summary:")
-            print(f"  Albums fully matched (album-level): {album_matches}")
-            print(f"  Albums partially matched (track-level): {partial_matches}")
-            print(f"  Albums unmatched: {unmatched_count}")
-            print(f"{'='*80}\n")
-        
+            log.info(f"\n{'='*80}")
+            log.info(f"Folder '{folder_name}' Summary:")
+            log.info(f"  Albums fully matched (album-level): {album_matches}")
+            log.info(f"  Albums partially matched (track-level): {partial_matches}")
+            log.info(f"  Albums unmatched: {unmatched_count}")
+            log.info(f"{'='*80}\n")
+
         # Filter out tracks that already exist in the playlist
-        print(f"\nFiltering tracks...")
-        print(f"  Total tracks found: {len(all_new_tracks)}")
-        new_tracks = [uri for uri in all_new_tracks if uri not in existing_playlist_tracks]
-        skipped_count = len(all_new_tracks) - len(new_tracks)
-        print(f"  New tracks to add: {len(new_tracks)}")
-        print(f"  Tracks already in playlist (skipped): {skipped_count}")
-        
+        log.info(f"\nFiltering tracks...")
+        log.info(f"  Total tracks found: {len(all_new_tracks)}")
+        unique_tracks = list(dict.fromkeys(all_new_tracks))  # De-duplicate, keeping first-seen order
+        new_tracks = [uri for uri in unique_tracks if uri not in existing_playlist_tracks]
+        duplicate_count = len(all_new_tracks) - len(unique_tracks)
+        skipped_count = len(unique_tracks) - len(new_tracks)
+        log.info(f"  New tracks to add: {len(new_tracks)}")
+        log.info(f"  Duplicate tracks across albums (skipped): {duplicate_count}")
+        log.info(f"  Tracks already in playlist (skipped): {skipped_count}")
+
         # Add new tracks to existing playlist
         if new_tracks:
-            print(f"\nAdding {len(new_tracks)} new tracks to existing playlist...")
+            log.info(f"\nAdding {len(new_tracks)} new tracks to existing playlist...")
             added_count = spotify_add_tracks_to_playlist(playlist_id, new_tracks, sp=sp)
-            print(f"Successfully added {added_count} tracks to playlist")
-            print(f"Playlist URL: https://open.spotify.com/playlist/{playlist_id}")
-        else:
-            print(f"\nNo new tracks to add - all tracks already exist in the playlist.")
-        
-        # Write unmatched CSVs
-        if unmatched_albums:
-            unmatched_df = pd.DataFrame(unmatched_albums)
-            unmatched_csv = "unmatched_albums.csv"
-            unmatched_df.to_csv(unmatched_csv, index=False)
-            print(f"\nWrote {len(unmatched_albums)} unmatched albums to {unmatched_csv}")
-            print("You can manually review and add these to Spotify later.")
-        else:
-            print("\nAll albums were matched successfully!")
-        
-        if unmatched_tracks:
-            unmatched_tracks_df = pd.DataFrame(unmatched_tracks)
-            unmatched_tracks_csv = "unmatched_tracks.csv"
-            unmatched_tracks_df.to_csv(unmatched_tracks_csv, index=False)
-            print(f"\nWrote {len(unmatched_tracks)} unmatched tracks to {unmatched_tracks_csv}")
-            print("You can manually review and add these to Spotify later.")
+            log.info(f"Successfully added {added_count} tracks to playlist")
+            log.info(f"Playlist URL: https://open.spotify.com/playlist/{playlist_id}")
         else:
-            print("\nAll tracks were matched successfully!")
-        
+            log.info(f"\nNo new tracks to add - all tracks already exist in the playlist.")
+
+        write_unmatched_csvs(unmatched_albums, unmatched_tracks)
         return
-    
+
     # Original folder-based playlist creation mode (when SPOTIFY_PLAYLIST_URL is not set)
-    # Determine folders to process
-    if not DISCOGS_USER or not DISCOGS_TOKEN:
-        print("DISCOGS_USER or DISCOGS_TOKEN not set. Cannot fetch collection folders.")
-        return
-    
-    folders_dict = discogs_get_collection_folders_with_names(DISCOGS_USER)
-    folders_to_process = []
-    
-    # Check if INPUT_PREFIX was customized (different from default)
-    default_prefix = os.getenv("VINYL_INPUT_PREFIX", "covers/").strip()
-    prefix_was_customized = config.INPUT_PREFIX != default_prefix
-    
-    # If INPUT_PREFIX was customized, filter folders based on GCS structure
-    gcs_folder_names = set()
-    if prefix_was_customized:
-        print(f"\nINPUT_PREFIX was customized to: {config.INPUT_PREFIX}")
-        print("Extracting folder names from GCS paths...")
-        gcs_folder_names = get_folders_from_gcs_prefix(config.INPUT_PREFIX)
-        if gcs_folder_names:
-            print(f"Found folders in GCS: {', '.join(sorted(gcs_folder_names))}")
-        else:
-            print("Warning: No folders found in GCS under the specified prefix.")
-    
-    # If INPUT_PREFIX was customized via --input-prefix, it takes precedence over DISCOGS_PLAYLIST_SOURCE_FOLDER
-    if prefix_was_customized:
-        # Process only folders found in GCS under the specified prefix (ignore DISCOGS_PLAYLIST_SOURCE_FOLDER)
-        if gcs_folder_names:
-            print(f"\n--input-prefix takes precedence. Processing folders found in GCS: {', '.join(sorted(gcs_folder_names))}")
-            for name, folder_id in folders_dict.items():
-                if name in gcs_folder_names:
-                    folders_to_process.append((folder_id, name))
-        else:
-            print(f"Warning: No folders found in GCS under prefix '{config.INPUT_PREFIX}'. Nothing to process.")
-            return
-    elif DISCOGS_PLAYLIST_SOURCE_FOLDER:
-        # Single folder mode (only when --input-prefix is NOT set)
-        folder_name_lower = DISCOGS_PLAYLIST_SOURCE_FOLDER.lower()
-        folder_id = None
-        for name, fid in folders_dict.items():
-            if name.lower() == folder_name_lower:
-                folder_id = fid
-                folders_to_process.append((fid, name))
-                break
-        
-        if not folder_id:
-            print(f"Error: Folder '{DISCOGS_PLAYLIST_SOURCE_FOLDER}' not found in your Discogs collection.")
-            print(f"Available folders: {', '.join(folders_dict.keys())}")
-            return
-    else:
-        # Multi-folder mode: process all custom folders (IDs >= 2)
-        for name, folder_id in folders_dict.items():
-            if folder_id >= 2:  # Skip system folders (0 = All, 1 = Uncategorized)
-                folders_to_process.append((folder_id, name))
-    
-    if not folders_to_process:
-        print("No folders to process.")
-        return
-    
-    print(f"\nProcessing {len(folders_to_process)} folder(s)...")
-    
-    # Track unmatched albums and tracks for CSV output
-    unmatched_albums = []
-    unmatched_tracks = []
     all_track_uris = set()  # For de-duplication across all playlists
-    
-    # Process each folder
-    for folder_id, folder_name in folders_to_process:
-        print(f"\n{'='*80}")
-        print(f"Processing folder: {folder_name} (ID: {folder_id})")
-        print(f"{'='*80}")
-        
-        # Fetch releases from folder
-        print(f"Fetching releases from folder '{folder_name}'...")
-        releases = discogs_list_folder_releases(DISCOGS_USER, folder_id)
-        print(f"Found {len(releases)} releases in folder '{folder_name}'")
-        
+
+    for folder_id, folder_name, releases in folder_releases:
         if not releases:
             continue
-        
+
         # Create playlist
         today = datetime.now().strftime("%Y-%m-%d")
         playlist_name = f"{folder_name} — Discogs albums ({today})"
         playlist_description = f"Built from Discogs folder: {folder_name}"
-        
-        print(f"Creating playlist: {playlist_name}")
+
+        log.info(f"\nCreating playlist: {playlist_name}")
         playlist_id, playlist_url = spotify_create_playlist(playlist_name, playlist_description, public=False, sp=sp)
-        
+
         if not playlist_id:
-            print(f"Failed to create playlist for folder '{folder_name}'. Skipping.")
+            log.info(f"Failed to create playlist for folder '{folder_name}'. Skipping.")
             continue
-        
-        print(f"Playlist created: {playlist_url}")
-        
-        # Track statistics for this folder
-        album_matches = 0
-        partial_matches = 0
-        unmatched_count = 0
-        track_uris_for_playlist = []
-        seen_albums = set()  # De-duplication within folder
-        
-        # Process each release
-        for idx, release in enumerate(releases, 1):
-            release_id = release["release_id"]
-            album_title = release["album_title"]
-            artist_name = release["artist_name"]
-            year = release.get("year")
-            discogs_url = release["discogs_url"]
-            
-            print(f"\n[{idx}/{len(releases)}] {artist_name} - {album_title}")
-            
-            # Skip if we've already processed this album (de-duplication)
-            album_key = (album_title.lower(), artist_name.lower())
-            if album_key in seen_albums:
-                print(f"  Skipping duplicate album")
-                continue
-            seen_albums.add(album_key)
-            
-            # Try album-level match
-            album_id, album_data = spotify_search_album(album_title, artist_name, year, sp=sp)
-            
-            if album_id:
-                # Album matched - get all tracks
-                print(f"  ✓ Album matched on Spotify")
-                album_tracks = spotify_get_album_tracks(album_id, sp=sp)
-                
-                if album_tracks:
-                    # Filter out tracks already added (de-duplication)
-                    new_tracks = [uri for uri in album_tracks if uri not in all_track_uris]
-                    track_uris_for_playlist.extend(new_tracks)
-                    all_track_uris.update(new_tracks)
-                    album_matches += 1
-                    print(f"  Added {len(new_tracks)} tracks from album")
-                else:
-                    print(f"  Warning: Album matched but no tracks found")
-                    unmatched_count += 1
-                    unmatched_albums.append({
-                        "folder_name": folder_name,
-                        "discogs_release_id": release_id,
-                        "discogs_url": discogs_url,
-                        "album_title": album_title,
-                        "artist_name": artist_name,
-                        "notes": "Album matched but no tracks available"
-                    })
-            else:
-                # Album not matched - try track-level fallback
-                print(f"  Album not found, trying track-level matching...")
-                tracklist = discogs_get_release_tracklist(release_id)
-                
-                if not tracklist:
-                    print(f"  No tracklist available on Discogs")
-                    unmatched_count += 1
-                    unmatched_albums.append({
-                        "folder_name": folder_name,
-                        "discogs_release_id": release_id,
-                        "discogs_url": discogs_url,
-                        "album_title": album_title,
-                        "artist_name": artist_name,
-                        "notes": "Album not found, no tracklist available"
-                    })
-                    continue
-                
-                matched_tracks = []
-                for track in tracklist:
-                    track_title = track.get("title", "").strip()
-                    if not track_title:
-                        continue
-                    
-                    track_uri, _ = spotify_search_track(track_title, artist_name, album_title, sp=sp)
-                    if track_uri and track_uri not in all_track_uris:
-                        matched_tracks.append(track_uri)
-                        all_track_uris.add(track_uri)
-                    else:
-                        # Track not matched - add to unmatched tracks list
-                        unmatched_tracks.append({
-                            "folder_name": folder_name,
-                            "discogs_release_id": release_id,
-                            "discogs_url": discogs_url,
-                            "album_title": album_title,
-                            "artist_name": artist_name,
-                            "track_title": track_title,
-                            "track_position": track.get("position", ""),
-                            "notes": "Track not found on Spotify"
-                        })
-                
-                if matched_tracks:
-                    track_uris_for_playlist.extend(matched_tracks)
-                    partial_matches += 1
-                    print(f"  ✓ Matched {len(matched_tracks)}/{len(tracklist)} tracks")
-                else:
-                    unmatched_count += 1
-                    unmatched_albums.append({
-                        "folder_name": folder_name,
-                        "discogs_release_id": release_id,
-                        "discogs_url": discogs_url,
-                        "album_title": album_title,
-                        "artist_name": artist_name,
-                        "notes": "Album not found, no tracks matched"
-                    })
-                    print(f"  ✗ No tracks matched")
-            
-            time.sleep(0.3)  # Rate limiting between releases
-        
+
+        log.info(f"Playlist created: {playlist_url}")
+
+        # De-duplication within folder; tracks already placed in an earlier playlist are skipped
+        folder_tracks, album_matches, partial_matches, unmatched_count = tally_folder_matches(
+            folder_name, releases, matches, set(), unmatched_albums, unmatched_tracks
+        )
+        # Single probe per URI: set.add() returns None, so a new URI is recorded and kept in one step
+        track_uris_for_playlist = [uri for uri in folder_tracks
+                                   if uri not in all_track_uris and not all_track_uris.add(uri)]
+
         # Add tracks to playlist
         if track_uris_for_playlist:
-            print(f"\nAdding {len(track_uris_for_playlist)} tracks to playlist...")
+            log.info(f"\nAdding {len(track_uris_for_playlist)} tracks to playlist...")
             added_count = spotify_add_tracks_to_playlist(playlist_id, track_uris_for_playlist, sp=sp)
-            print(f"Successfully added {added_count} tracks to playlist")
+            log.info(f"Successfully added {added_count} tracks to playlist")
         else:
-            print(f"No tracks to add to playlist")
-        
+            log.info(f"No tracks to add to playlist")
+
         # Summary for this folder
-        print(f"\n{'='*80}")
-        print(f"Folder '{folder_name}' Summary:")
-        print(f"  Playlist: {playlist_url}")
-        print(f"  Albums fully matched (album-level): {album_matches}")
-        print(f"  Albums partially matched (track-level): {partial_matches}")
-        print(f"  Albums unmatched: {unmatched_count}")
-        print(f"  Total tracks added: {len(track_uris_for_playlist)}")
-        print(f"{'='*80}\n")
-    
-    # Write unmatched CSVs
-    if unmatched_albums:
-        unmatched_df = pd.DataFrame(unmatched_albums)
-        unmatched_csv = "unmatched_albums.csv"
-        unmatched_df.to_csv(unmatched_csv, index=False)
-        print(f"\nWrote {len(unmatched_albums)} unmatched albums to {unmatched_csv}")
-        print("You can manually review and add these to Spotify later.")
-    else:
-        print("\nAll albums were matched successfully!")
-    
-    if unmatched_tracks:
-        unmatched_tracks_df = pd.DataFrame(unmatched_tracks)
-        unmatched_tracks_csv = "unmatched_tracks.csv"
-        unmatched_tracks_df.to_csv(unmatched_tracks_csv, index=False)
-        print(f"\nWrote {len(unmatched_tracks)} unmatched tracks to {unmatched_tracks_csv}")
-        print("You can manually review and add these to Spotify later.")
-    else:
-        print("\nAll tracks were matched successfully!")
+        log.info(f"\n{'='*80}")
+        log.info(f"Folder '{folder_name}' Summary:")
+        log.info(f"  Playlist: {playlist_url}")
+        log.info(f"  Albums fully matched (album-level): {album_matches}")
+        log.info(f"  Albums partially matched (track-level): {partial_matches}")
+        log.info(f"  Albums unmatched: {unmatched_count}")
+        log.info(f"  Total tracks added: {len(track_uris_for_playlist)}")
+        log.info(f"{'='*80}\n")
 
+    write_unmatched_csvs(unmatched_albums, unmatched_tracks)
@@ -13,6 +13,8 @@
 #   export DISCOGS_APP_URL="https://github.com/yourrepo"
 
 import os
+import sys
+import logging
 import argparse
 
 # Import configuration (loads .env and sets up environment)
@@ -25,6 +27,10 @@ from workflows import (
     organize_folders_workflow
 )
 from spotify_playlists import build_spotify_playlists
+from discogs_cache import invalidate_discogs_cache
+
+# Modules that log through logging.getLogger(__name__); --verbose lowers only these to DEBUG
+APP_LOGGERS = ("discogs_api", "helpers", "http_client", "spotify_api", "spotify_playlists", "vision_api")
 
 
 def main(update_conditions_only=False, organize_folders_only=False, test_discogs_match=False, build_spotify_playlists_only=False):
@@ -101,10 +107,20 @@ if __name__ == "__main__":
                         help='Process first 10 images, show Discogs match results, but do not write CSV or update collection.')
     parser.add_argument('--build-spotify-playlists', action='store_true',
                         help='Skip all other steps and only build Spotify playlists from Discogs collection folders.')
+    parser.add_argument('--verbose', action='store_true',
+                        help='Enable debug logging.')
+    parser.add_argument('--invalidate-discogs-cache', action='store_true',
+                        help='Discard cached Discogs releases, masters, searches and tracklists before running.')
     parser.add_argument('--input-prefix', type=str, default=None,
                         help='GCS prefix/path to process images from (e.g., "covers/Owner/" or "covers/2024/January/"). Overrides VINYL_INPUT_PREFIX env var.')
     args = parser.parse_args()
     
+    # Log plain messages to stdout so output reads like the rest of the script's prints.
+    # Third-party loggers (urllib3, google, spotipy) stay at WARNING; --verbose only affects ours
+    logging.basicConfig(level=logging.WARNING, format="%(message)s", stream=sys.stdout)
+    for name in APP_LOGGERS:
+        logging.getLogger(name).setLevel(logging.DEBUG if args.verbose else logging.INFO)
+    
     # Validate flag combinations
     flags_set = sum([args.update_conditions_only, args.organize_folders_only, args.test_discogs_match, args.build_spotify_playlists])
     if flags_set > 1:
@@ -113,6 +129,9 @@ if __name__ == "__main__":
     if not args.update_conditions_only and not args.organize_folders_only and not args.test_discogs_match and not args.build_spotify_playlists and not config.GCS_BUCKET:
         raise SystemExit("GCS_BUCKET is empty; set it at the top of the script.")
     
+    if args.invalidate_discogs_cache:
+        invalidate_discogs_cache()
+    
     # Override INPUT_PREFIX if --input-prefix argument is provided
     if args.input_prefix:
         input_prefix = args.input_prefix.strip()
@@ -3,44 +3,154 @@ Google Cloud Vision API client module.
 Handles batch image annotation with chunking and rate limiting.
 """
 
+import re
+import uuid
+import logging
+from itertools import islice
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from google.cloud import vision
 from google.protobuf.json_format import MessageToDict
-from config import VISION_SYNC_CHUNK
+from config import VISION_SYNC_CHUNK, VISION_CONCURRENCY, VISION_FULL_DICT
+from fast_json import json_loads
+
+log = logging.getLogger(__name__)
+
+VISION_ASYNC_MAX_IMAGES = 2000   # Images per async_batch_annotate_images operation (API limit)
+VISION_ASYNC_SHARD_SIZE = 100    # Responses per output JSON file
+VISION_ASYNC_TIMEOUT = 3600      # Seconds to wait for one operation
+_SHARD_START_RE = re.compile(r"output-(\d+)-to-\d+\.json$")
 
 
 def chunked(seq, n):
-    """Split a sequence into chunks of size n."""
-    for i in range(0, len(seq), n):
-        yield seq[i:i+n]
+    """Split an iterable into lists of size n (the last may be shorter)."""
+    it = iter(seq)
+    while True:
+        chunk = list(islice(it, n))
+        if not chunk:
+            return
+        yield chunk
+
+def _minimal_response_dict(r):
+    """
+    Extract just the fields downstream matching reads from one AnnotateImageResponse proto,
+    in the same camelCase shape MessageToDict produces.
+    """
+    d = {}
+    if r.error.code:
+        d["error"] = {"code": r.error.code, "message": r.error.message}
+    web = r.web_detection
+    d["webDetection"] = {
+        "pagesWithMatchingImages": [{"url": p.url} for p in web.pages_with_matching_images],
+        "bestGuessLabels": [{"label": l.label} for l in web.best_guess_labels],
+    }
+    if r.text_annotations:
+        d["textAnnotations"] = [{"description": r.text_annotations[0].description}]
+    return d
+
+def _response_dicts(resp):
+    """
+    Convert a BatchAnnotateImagesResponse into a list of per-image dicts.
+    By default only the fields used downstream are read off the protos; with VISION_FULL_DICT
+    the whole batch is converted in one MessageToDict call (useful for debugging).
+    Keys stay camelCase (webDetection, textAnnotations, ...) as downstream code expects.
+    """
+    try:
+        # Try the current approach first
+        pb = resp._pb
+    except AttributeError:
+        # Fallback if _pb doesn't exist (API change)
+        pb = resp
+    if VISION_FULL_DICT:
+        return MessageToDict(pb).get("responses", [])
+    return [_minimal_response_dict(r) for r in pb.responses]
+
+def _inject_uris(dicts, uris):
+    """
+    Set context.uri on each response dict, in order.
+    Returns False (leaving dicts untouched) when the counts differ, since responses
+    can't then be paired with their images reliably.
+    """
+    if len(dicts) != len(uris):
+        log.warning(f"Expected {len(uris)} responses, got {len(dicts)}; "
+                    f"skipping this batch (its images will be retried on the next run)")
+        return False
+    for d, uri in zip(dicts, uris):
+        d.setdefault("context", {})["uri"] = uri
+    return True
 
-def run_vision_sync(vision_client, requests_list, uris):
+def run_vision_sync(vision_client, items, on_batch=None):
     """
     Call batch_annotate_images in chunks and return response dicts
     with context.uri injected so downstream code can read it uniformly.
+    items: Iterable of (uri, AnnotateImageRequest) pairs. It is consumed lazily, so chunks are
+           submitted as soon as their images are ready (e.g. while later downloads are still running).
+           Progress shows a batch total only when items has a length.
+    on_batch: Optional callback given each batch's response dicts as soon as they arrive
+              (e.g. to persist them before the rest of the run completes).
+    Up to VISION_CONCURRENCY chunks are in flight at once; responses keep the input order.
+    Chunks whose response count doesn't match their request count are dropped (see _inject_uris).
     """
     all_responses = []
-    idx = 0
-    total_batches = (len(requests_list) + VISION_SYNC_CHUNK - 1) // VISION_SYNC_CHUNK
+    total = len(items) if hasattr(items, "__len__") else None
+    total_str = f"/{(total + VISION_SYNC_CHUNK - 1) // VISION_SYNC_CHUNK}" if total else ""
+    pending = deque()  # (chunk_uris, future) in submission order
     batch_num = 0
-    
-    for chunk in chunked(requests_list, VISION_SYNC_CHUNK):
+
+    def collect(chunk_uris, future):
+        nonlocal batch_num
         batch_num += 1
-        resp = vision_client.batch_annotate_images(requests=chunk)
-        print(f"Processing batch {batch_num}/{total_batches}...")
-        dicts = []
-        for r in resp.responses:
-            try:
-                # Try the current approach first
-                dicts.append(MessageToDict(r._pb))
-            except AttributeError:
-                # Fallback if _pb doesn't exist (API change)
-                dicts.append(MessageToDict(r))
-        if len(dicts) != len(chunk):
-            print(f"WARNING: expected {len(chunk)} responses, got {len(dicts)}")
-        for d in dicts:
-            if "context" not in d:
-                d["context"] = {}
-            d["context"]["uri"] = uris[idx] if idx < len(uris) else None
-            idx += 1
+        dicts = _response_dicts(future.result())
+        print(f"Processing batch {batch_num}{total_str}...")
+        if not _inject_uris(dicts, chunk_uris):
+            return
+        if on_batch:
+            on_batch(dicts)
         all_responses.extend(dicts)
+
+    with ThreadPoolExecutor(max_workers=VISION_CONCURRENCY) as executor:
+        for chunk in chunked(items, VISION_SYNC_CHUNK):
+            chunk_uris = [uri for uri, _ in chunk]
+            future = executor.submit(vision_client.batch_annotate_images, requests=[req for _, req in chunk])
+            pending.append((chunk_uris, future))
+            # Bound in-flight chunks so memory stays flat on large runs
+            while len(pending) > VISION_CONCURRENCY:
+                collect(*pending.popleft())
+        while pending:
+            collect(*pending.popleft())
     return all_responses
 
+def run_vision_async_batch(vision_client, storage_client, items, output_uri_prefix):
+    """
+    Annotate images with async_batch_annotate_images, which writes results as JSON files to GCS.
+    items: List of (uri, AnnotateImageRequest) pairs; requests should reference images by GCS URI.
+    output_uri_prefix: gs:// prefix for the output files; each operation writes under its own
+                       subfolder, which is deleted once read.
+    Returns response dicts (same shape as run_vision_sync) in input order; an operation whose
+    response count doesn't match its request count is dropped (see _inject_uris).
+    """
+    all_responses = []
+    chunks = list(chunked(items, VISION_ASYNC_MAX_IMAGES))
+    for op_num, chunk in enumerate(chunks, 1):
+        run_prefix = f"{output_uri_prefix.rstrip('/')}/{uuid.uuid4().hex}/"
+        output_config = vision.OutputConfig(
+            gcs_destination=vision.GcsDestination(uri=run_prefix),
+            batch_size=VISION_ASYNC_SHARD_SIZE,
+        )
+        print(f"Submitting async Vision batch {op_num}/{len(chunks)} ({len(chunk)} images)...")
+        operation = vision_client.async_batch_annotate_images(
+            requests=[req for _, req in chunk], output_config=output_config
+        )
+        operation.result(timeout=VISION_ASYNC_TIMEOUT)
+
+        # Output shards are named output-<first>-to-<last>.json; read them back in order
+        bucket_name, _, path = run_prefix[len("gs://"):].partition("/")
+        blobs = [b for b in storage_client.list_blobs(bucket_name, prefix=path) if _SHARD_START_RE.search(b.name)]
+        blobs.sort(key=lambda b: int(_SHARD_START_RE.search(b.name).group(1)))
+        dicts = []
+        for blob in blobs:
+            dicts.extend(json_loads(blob.download_as_bytes()).get("responses", []))
+            blob.delete()
+        if _inject_uris(dicts, [uri for uri, _ in chunk]):
+            all_responses.extend(dicts)
+    return all_responses
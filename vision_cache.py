@@ -1,29 +1,77 @@
 """
 Vision API result caching module.
 Handles loading and saving Vision API results to avoid redundant API calls.
+
+Results live in a compacted JSON snapshot plus an append-only JSON-lines log of newer entries,
+so storing a result costs one appended line instead of rewriting the whole cache.
 """
 
 import os
-import json
+from fast_json import json_loads, json_dumps
 
 VISION_CACHE_FILE = "vision_results.json"
+VISION_CACHE_LOG = "vision_results.log.jsonl"
+VISION_COMPACT_THRESHOLD = 500  # Fold the log into the snapshot once it holds this many entries
+
+_log_file = None
+_log_entries = 0
 
 def load_vision_cache():
-    """Load previously saved Vision API results from JSON file."""
+    """Load previously saved Vision API results: JSON snapshot, then replay the append log."""
+    global _log_entries
+    cache = {}
     if os.path.exists(VISION_CACHE_FILE):
         try:
-            with open(VISION_CACHE_FILE, 'r') as f:
-                return json.load(f)
+            with open(VISION_CACHE_FILE, 'rb') as f:
+                cache = json_loads(f.read())
         except Exception as e:
             print(f"Warning: Could not load vision cache: {e}. Starting fresh.")
-            return {}
-    return {}
+            cache = {}
+
+    _log_entries = 0
+    if os.path.exists(VISION_CACHE_LOG):
+        with open(VISION_CACHE_LOG, 'rb') as f:
+            for line in f:
+                try:
+                    uri, result = json_loads(line)
+                except Exception:
+                    continue  # Torn write from an interrupted run
+                cache[uri] = result
+                _log_entries += 1
+    return cache
+
+def _append_log(uri, result):
+    global _log_file, _log_entries
+    if _log_file is None:
+        _log_file = open(VISION_CACHE_LOG, 'a', encoding='utf-8', buffering=1 << 20)
+    _log_file.write(json_dumps([uri, result]) + "\n")
+    _log_entries += 1
+
+def flush_vision_cache():
+    """Push appended results to disk without compacting (cheap enough to call after every batch)."""
+    if _log_file is not None:
+        _log_file.flush()
 
 def save_vision_cache(cache):
-    """Save Vision API results to JSON file."""
+    """
+    Persist Vision API results. Flushes the append log; once it grows past
+    VISION_COMPACT_THRESHOLD entries, rewrites the snapshot and truncates the log.
+    """
+    global _log_file, _log_entries
     try:
-        with open(VISION_CACHE_FILE, 'w') as f:
-            json.dump(cache, f, indent=2)
+        if _log_file is not None:
+            _log_file.flush()
+        if _log_entries >= VISION_COMPACT_THRESHOLD or not os.path.exists(VISION_CACHE_FILE):
+            tmp_path = VISION_CACHE_FILE + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(json_dumps(cache))  # Compact: indenting nested Vision responses roughly doubles size and write time
+            os.replace(tmp_path, VISION_CACHE_FILE)
+            if _log_file is not None:
+                _log_file.close()
+                _log_file = None
+            if os.path.exists(VISION_CACHE_LOG):
+                os.remove(VISION_CACHE_LOG)
+            _log_entries = 0
         print(f"Saved Vision results for {len(cache)} images to {VISION_CACHE_FILE}")
     except Exception as e:
         print(f"Warning: Could not save vision cache: {e}")
@@ -33,6 +81,6 @@ def get_vision_result(cache, uri):
     return cache.get(uri)
 
 def set_vision_result(cache, uri, result):
-    """Store Vision result for a specific image URI."""
+    """Store Vision result for a specific image URI (appended to the on-disk log)."""
     cache[uri] = result
-
+    _append_log(uri, result)
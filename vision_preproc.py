@@ -0,0 +1,38 @@
+"""
+Image preprocessing before Vision upload.
+Downscales large cover photos so Vision requests are smaller and faster. Uses Pillow when
+installed; without it images are sent unchanged.
+"""
+
+import io
+from config import VISION_MAX_SIDE
+
+try:
+    from PIL import Image, ImageOps
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+
+def prepare_image_bytes(content: bytes, max_side: int = VISION_MAX_SIDE, jpeg_quality: int = 85) -> bytes:
+    """
+    Downscale an image so its longest side is at most max_side pixels, re-encoded as JPEG.
+    Returns the original bytes if Pillow is missing, max_side is 0, the image is already small
+    enough, or it cannot be decoded (Vision then reports on the original as before).
+    """
+    if not PIL_AVAILABLE or max_side <= 0:
+        return content
+    try:
+        with Image.open(io.BytesIO(content)) as img:
+            if max(img.size) <= max_side:
+                return content
+            img = ImageOps.exif_transpose(img)  # Phone photos: apply rotation before resizing
+            img.thumbnail((max_side, max_side), Image.LANCZOS)
+            if img.mode != "RGB":
+                img = img.convert("RGB")
+            buf = io.BytesIO()
+            img.save(buf, "JPEG", quality=jpeg_quality, optimize=True)
+    except Exception:
+        return content
+    prepared = buf.getvalue()
+    return prepared if len(prepared) < len(content) else content
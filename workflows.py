@@ -4,8 +4,9 @@ Handles image processing, Discogs matching, collection updates, and folder organ
 """
 
 import os
-import time
 import pandas as pd
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from google.cloud import vision, storage
 from google.cloud.exceptions import NotFound, Forbidden
 from google.auth.exceptions import DefaultCredentialsError
@@ -13,21 +14,29 @@ from google.auth.exceptions import DefaultCredentialsError
 import config
 from config import (
     GCS_BUCKET, DISCOGS_USER, DISCOGS_TOKEN, DISCOGS_FOLDER_ID,
-    DISCOGS_MEDIA_CONDITION, DISCOGS_SLEEVE_CONDITION
+    DISCOGS_MEDIA_CONDITION, DISCOGS_SLEEVE_CONDITION, GCS_DOWNLOAD_WORKERS, DISCOGS_CONCURRENCY,
+    VISION_USE_ASYNC_BATCH, VISION_ASYNC_MIN_IMAGES, VISION_ASYNC_OUTPUT_PREFIX, VISION_SYNC_CHUNK
 )
-from helpers import gcs_uri, filename_from_gcs_uri, extract_owner_from_uri, owner_from_gcs_uri, split_top_candidate_urls, extract_release_or_master, confidence_bucket
-from vision_cache import load_vision_cache, get_vision_result, set_vision_result, save_vision_cache
-from vision_api import run_vision_sync
+from helpers import progress_milestones, write_dicts_csv, list_image_names, gcs_uri, filename_from_gcs_uri, extract_owner_from_uri, owner_from_gcs_uri, split_top_candidate_urls, extract_release_or_master, confidence_bucket
+from vision_cache import load_vision_cache, get_vision_result, set_vision_result, save_vision_cache, flush_vision_cache
+from vision_preproc import prepare_image_bytes
+from vision_api import run_vision_sync, run_vision_async_batch
+from discogs_cache import save_discogs_cache
 from discogs_api import (
-    discogs_get_release, validate_release_is_vinyl_and_us, discogs_release_from_master,
+    discogs_get_release, validate_release_is_vinyl_and_us, cached_release_from_master,
     cached_discogs_search, discogs_list_all_collection_release_ids,
-    discogs_add_to_collection, discogs_get_instance_for_release,
-    discogs_get_or_create_folder, discogs_move_instance,
+    discogs_add_to_collection, discogs_list_folder_instances,
+    discogs_get_or_create_folders, discogs_move_instance,
     discogs_list_all_collection_instances, discogs_update_instance_condition
 )
 from spotify_playlists import build_spotify_playlists
 
 
+def _condition_missing(value):
+    """True if a condition value is null/empty (or whitespace only)."""
+    return not value or (isinstance(value, str) and not value.strip())
+
+
 def update_conditions_workflow():
     """Update collection items with null conditions."""
     if not DISCOGS_USER or not DISCOGS_TOKEN:
@@ -43,41 +52,44 @@ def update_conditions_workflow():
     
     print(f"Found {len(instances)} items in collection. Checking for null conditions...")
     
-    updated_count = 0
+    # Select the items needing an update in one pass; only those reach the API loop
+    to_update = []
     for instance in instances:
-        media = instance.get("media_condition")
-        sleeve = instance.get("sleeve_condition")
-        
-        # Check if either condition is null/empty
-        needs_media = not media or (isinstance(media, str) and media.strip() == "")
-        needs_sleeve = not sleeve or (isinstance(sleeve, str) and sleeve.strip() == "")
-        
-        if needs_media or needs_sleeve:
-            try:
-                instance_id = instance.get("instance_id")
-                release_id = instance.get("release_id")
-                folder_id = instance.get("folder_id")
-                
-                # Validate we have valid IDs and instance_id != release_id
-                if not instance_id or not release_id or not folder_id:
-                    continue
-                if instance_id == release_id:
-                    continue
-                
-                discogs_update_instance_condition(
-                    DISCOGS_USER, folder_id, release_id, instance_id,
-                    media_condition=DISCOGS_MEDIA_CONDITION if needs_media else None,
-                    sleeve_condition=DISCOGS_SLEEVE_CONDITION if needs_sleeve else None
-                )
+        needs_media = _condition_missing(instance.get("media_condition"))
+        needs_sleeve = _condition_missing(instance.get("sleeve_condition"))
+        if not (needs_media or needs_sleeve):
+            continue
+        instance_id = instance.get("instance_id")
+        release_id = instance.get("release_id")
+        folder_id = instance.get("folder_id")
+        # Validate we have valid IDs and instance_id != release_id
+        if not instance_id or not release_id or not folder_id or instance_id == release_id:
+            continue
+        to_update.append((folder_id, release_id, instance_id, needs_media, needs_sleeve))
+    
+    def update(item):
+        folder_id, release_id, instance_id, needs_media, needs_sleeve = item
+        try:
+            discogs_update_instance_condition(
+                DISCOGS_USER, folder_id, release_id, instance_id,
+                media_condition=DISCOGS_MEDIA_CONDITION if needs_media else None,
+                sleeve_condition=DISCOGS_SLEEVE_CONDITION if needs_sleeve else None
+            )
+            return True
+        except Exception as e:
+            error_msg = str(e)
+            if "404" not in error_msg:
+                print(f"Failed to update instance {instance_id} (release {release_id}): {e}")
+            return False
+    
+    # Updates are independent POSTs: keep several in flight, paced by the shared Discogs rate limiter
+    updated_count = 0
+    with ThreadPoolExecutor(max_workers=DISCOGS_CONCURRENCY) as executor:
+        for updated in executor.map(update, to_update):
+            if updated:
                 updated_count += 1
                 if updated_count % 10 == 0:
                     print(f"Updated {updated_count} items with default conditions...")
-                time.sleep(1.1)  # Rate limiting
-            except Exception as e:
-                error_msg = str(e)
-                if "404" in error_msg:
-                    continue
-                print(f"Failed to update instance {instance.get('instance_id')} (release {instance.get('release_id')}): {e}")
     
     if updated_count > 0:
         print(f"Updated {updated_count} collection items with default conditions.")
@@ -85,6 +97,52 @@ def update_conditions_workflow():
         print("No items found with null conditions.")
 
 
+def _move_release_to_folder(rid, instance_id, current_folder_id, target_folder_id, folder_name):
+    """
+    Move one collection instance to its Discogs folder.
+    Returns True if moved (or already in the right folder).
+    """
+    if current_folder_id == target_folder_id:
+        return True
+    try:
+        success = discogs_move_instance(
+            DISCOGS_USER, rid, instance_id,
+            current_folder_id, target_folder_id
+        )
+        return bool(success)
+    except Exception as e:
+        print(f"Warning: Failed to move release {rid} to folder '{folder_name}': {e}")
+        return False
+
+
+def move_releases_to_folders(release_to_folder, discogs_folders, max_workers=DISCOGS_CONCURRENCY):
+    """
+    Move releases from Uncategorized into their Discogs folders, several moves at once.
+    Uncategorized (where new releases are added by default) is listed once up front
+    instead of being searched per release.
+    Requests stay within the Discogs rate limit via the shared limiter in http_client.
+    Returns (found_in_uncategorized, moved_count).
+    """
+    uncategorized = discogs_list_folder_instances(DISCOGS_USER, 1)
+    to_move = []
+    for rid, folder_name in release_to_folder.items():
+        if not folder_name or folder_name not in discogs_folders:
+            continue
+        entry = uncategorized.get(rid)
+        if entry:
+            instance_id, current_folder_id = entry
+            to_move.append((rid, instance_id, current_folder_id, discogs_folders[folder_name], folder_name))
+    moved_count = 0
+    milestones = progress_milestones(len(to_move))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(lambda item: _move_release_to_folder(*item), to_move)
+        for move_idx, moved in enumerate(results, 1):
+            moved_count += moved
+            if move_idx in milestones:
+                print(f"Moved {move_idx}/{len(to_move)} releases...")
+    return len(to_move), moved_count
+
+
 def organize_folders_workflow():
     """Organize existing collection items into owner-based folders."""
     if not DISCOGS_USER or not DISCOGS_TOKEN:
@@ -97,24 +155,28 @@ def organize_folders_workflow():
         print(f"Error: {csv_file} not found. Run the full script first to generate it.")
         return
     
-    df = pd.read_csv(csv_file)
+    # Only the columns used below; declared dtypes skip per-column type inference
+    df = pd.read_csv(
+        csv_file,
+        usecols=["status", "discogs_release_id", "image_gcs_uri"],
+        dtype={"status": "category", "discogs_release_id": "string", "image_gcs_uri": "string"},
+        engine="c",
+    )
     print(f"Loaded {len(df)} records from {csv_file}")
     
     # Build mapping of release_id -> discogs_folder_name for matched releases
     # Extract Discogs folder name from URI (not CSV owner, which is just first folder)
     matched_df = df[df["status"] == "matched"]
-    release_to_folder = {}
-    for _, row in matched_df.iterrows():
-        rid = row.get("discogs_release_id")
-        src_uri = row.get("image_gcs_uri", "")
-        if rid and src_uri:
-            try:
-                # Extract full Discogs folder name (e.g., "Dad_Shed") from URI
-                discogs_folder_name = owner_from_gcs_uri(src_uri)
-                if discogs_folder_name:  # Only add if we have a folder name
-                    release_to_folder[int(rid)] = discogs_folder_name
-            except (ValueError, TypeError):
-                continue
+    # Column-wise instead of iterrows(): non-numeric IDs become NaN and are dropped
+    release_ids = pd.to_numeric(matched_df["discogs_release_id"], errors="coerce")
+    valid = release_ids.notna() & (release_ids != 0) & matched_df["image_gcs_uri"].notna()
+    # Extract full Discogs folder name (e.g., "Dad_Shed") from URI
+    folder_names = matched_df.loc[valid, "image_gcs_uri"].astype(str).map(owner_from_gcs_uri)
+    has_folder = folder_names != ""  # Only add if we have a folder name
+    release_to_folder = dict(zip(
+        release_ids[valid][has_folder].astype("int64").tolist(),
+        folder_names[has_folder].tolist(),
+    ))
     
     if not release_to_folder:
         print("No matched releases found in CSV. Nothing to organize.")
@@ -125,245 +187,218 @@ def organize_folders_workflow():
     print(f"Found {len(unique_folders)} unique Discogs folders: {', '.join(sorted(unique_folders))}")
     
     # Create folders for each unique folder name
-    discogs_folders = {}
-    for folder_name in unique_folders:
-        if not folder_name:
-            continue
-        folder_id = discogs_get_or_create_folder(DISCOGS_USER, folder_name)
-        if folder_id:
-            discogs_folders[folder_name] = folder_id
-            time.sleep(0.5)  # Rate limiting
+    discogs_folders = discogs_get_or_create_folders(DISCOGS_USER, unique_folders)
     
     # Move releases to appropriate folders
-    moved_count = 0
-    total_to_move = len(release_to_folder)
-    found_in_uncategorized = 0
-    
-    for move_idx, (rid, folder_name) in enumerate(release_to_folder.items(), 1):
-        if not folder_name or folder_name not in discogs_folders:
+    found_in_uncategorized, moved_count = move_releases_to_folders(release_to_folder, discogs_folders)
+    if found_in_uncategorized == 0:
+        print("No records found in Uncategorized folder. Nothing to move.")
+    else:
+        print(f"Moved {moved_count} releases to Discogs folders.")
+
+
+RECORDS_CSV_FIELDS = [
+    "owner", "image_filename", "image_gcs_uri", "status", "confidence_level",
+    "discogs_release_id", "discogs_url", "candidate_source", "has_discogs_candidate",
+    "candidate_discogs_urls_top3", "candidate_other_urls_top3", "artist_hint", "album_hint",
+    "best_guess_label", "error_message", "match_reason", "already_in_collection",
+]
+
+
+def _url_candidates(release_candidates, master_candidates, context, tried):
+    """
+    Yield validated candidates from Vision page URLs in priority order: release URLs, then masters.
+    Each is (release_id, url, match_method, is_vinyl, is_us, reason); releases are fetched lazily.
+    tried: Set of release/master IDs already considered for this image; IDs in it are skipped
+           (an earlier candidate with the same ID would already have won or been rejected).
+    """
+    for rid, url in release_candidates:
+        if rid in tried:
             continue
-        
-        try:
-            # Search Uncategorized folder (where new releases are added by default)
-            instance_id, current_folder_id = discogs_get_instance_for_release(DISCOGS_USER, rid, folder_id=1)
-            if not instance_id:
+        tried.add(rid)
+        release_data = discogs_get_release(rid, context=context)
+        if release_data:
+            yield (rid, url, "release_url", *validate_release_is_vinyl_and_us(release_data))
+    for mid, url in master_candidates:
+        if ("master", mid) in tried:
+            continue
+        tried.add(("master", mid))
+        result = cached_release_from_master(mid, context=context)
+        if isinstance(result, tuple) and len(result) == 4 and result[0]:
+            candidate_id, candidate_vinyl, candidate_us, reason = result
+            if candidate_id in tried:
                 continue
-            
-            found_in_uncategorized += 1
-            target_folder_id = discogs_folders[folder_name]
-            if current_folder_id != target_folder_id:
-                success = discogs_move_instance(
-                    DISCOGS_USER, rid, instance_id, 
-                    current_folder_id, target_folder_id
-                )
-                if success:
-                    moved_count += 1
-                if move_idx % 10 == 0 or move_idx == total_to_move:
-                    print(f"Moved {move_idx}/{total_to_move} releases...")
-                time.sleep(0.8)  # Rate limiting
-            else:
-                # Already in correct folder
-                moved_count += 1
-        except Exception as e:
-            print(f"Warning: Failed to move release {rid} to folder '{folder_name}': {e}")
+            tried.add(candidate_id)
+            yield (candidate_id, url, "master_url", candidate_vinyl, candidate_us, reason)
+
+
+SEARCH_HITS_TO_VALIDATE = 3  # Search precision drops quickly past the top few hits
+
+
+def _usable_hint(hint):
+    """True if an OCR/label hint is worth searching on: at least 3 characters and some letters."""
+    return bool(hint) and len(hint.strip()) >= 3 and any(c.isalpha() for c in hint)
+
+
+def _search_candidates(search_results, context, tried):
+    """
+    Yield validated candidates from the top SEARCH_HITS_TO_VALIDATE Discogs search hits,
+    in the same shape as _url_candidates.
+    """
+    for hit in search_results[:SEARCH_HITS_TO_VALIDATE]:
+        candidate_id = hit.get("id")
+        if candidate_id and candidate_id not in tried:
+            tried.add(candidate_id)
+            release_data = discogs_get_release(candidate_id, context=context)
+            if release_data:
+                yield (candidate_id, hit.get("uri"), "search_fallback", *validate_release_is_vinyl_and_us(release_data))
+
+
+def _pick_release(candidates):
+    """
+    Return the first vinyl+US candidate, else the first vinyl one, else None.
+    Stops consuming (and fetching) candidates at the first vinyl+US hit.
+    """
+    fallback = None
+    for candidate in candidates:
+        is_vinyl, is_us = candidate[3], candidate[4]
+        if is_vinyl and is_us:
+            return candidate
+        if is_vinyl and fallback is None:
+            fallback = candidate  # Keep as fallback if no US vinyl found
+    return fallback
+
+
+def process_one_response(idx, resp, total_images):
+    """
+    Match one Vision API response with Discogs.
+    Returns (summary_key, row): summary_key is "matched", "review_needed" or "errors".
+    """
+    src_uri = (resp.get("context") or {}).get("uri")
+    image_filename = filename_from_gcs_uri(src_uri) if src_uri else ""
+    owner = extract_owner_from_uri(src_uri)  # CSV owner: first folder after "covers"
+    
+    # Per-response Vision errors
+    err = resp.get("error")
+    if err:
+        return "errors", {
+            "owner": owner,
+            "image_filename": image_filename,
+            "image_gcs_uri": src_uri,
+            "status": "review_needed",
+            "confidence_level": "unknown",
+            "discogs_release_id": None,
+            "discogs_url": None,
+            "candidate_source": "none",
+            "has_discogs_candidate": False,
+            "candidate_discogs_urls_top3": None,
+            "candidate_other_urls_top3": None,
+            "artist_hint": None,
+            "album_hint": None,
+            "best_guess_label": None,
+            "error_message": err.get("message")
+        }
+    
+    # Read each webDetection field once; everything below works off these locals
+    web = resp.get("webDetection", {}) or {}
+    pages = web.get("pagesWithMatchingImages") or []
+    best_guess_labels = web.get("bestGuessLabels") or []
+    best_guess_label = best_guess_labels[0].get("label") if best_guess_labels else None
+    discogs_candidates, other_candidates = split_top_candidate_urls(web, limit=10)
+    has_discogs = bool(discogs_candidates)
+    
+    artist_hint = album_hint = None
+    img_context = f"image {idx}/{total_images}"
+    
+    # A) Harvest Discogs candidates from Vision (up to 10)
+    release_candidates = []
+    master_candidates = []
+    
+    for page in pages[:10]:
+        url = page.get("url") or ""
+        mtype, rid = extract_release_or_master(url)
+        if mtype == "release" and rid:
+            release_candidates.append((rid, url))
+        elif mtype == "master" and rid:
+            master_candidates.append((rid, url))
+    
+    # B) + C) Release URLs, then master URLs (resolved with vinyl+US preference)
+    tried = set()  # Release IDs (and ("master", id) keys) already considered for this image
+    best = _pick_release(_url_candidates(release_candidates, master_candidates, img_context, tried))
+    
+    # D) Fallback: OCR + Discogs search with filters
+    if not best:
+        text_ann = resp.get("textAnnotations") or []
+        text = (text_ann[0].get("description", "") if text_ann else "") or ""
+        parts = [p.strip() for p in text.splitlines() if p.strip()]
+        if len(parts) >= 2:
+            artist_hint, album_hint = parts[0], parts[1]
+        if (not album_hint) and best_guess_label and " - " in best_guess_label:
+            try:
+                artist_hint, album_hint = [s.strip() for s in best_guess_label.split(" - ", 1)]
+            except Exception:
+                pass
         
-        if found_in_uncategorized == 0:
-            print("No records found in Uncategorized folder. Nothing to move.")
-        else:
-            print(f"Moved {moved_count} releases to Discogs folders.")
+        # Skip the search (and its rate-limit cost) when both hints are OCR noise
+        search_results = (cached_discogs_search(artist_hint or "", album_hint or "", context=img_context)
+                          if (_usable_hint(artist_hint) or _usable_hint(album_hint)) else [])
+        best = _pick_release(_search_candidates(search_results, img_context, tried))
+    
+    # Determine status and confidence
+    if best:
+        release_id, match_url, match_method, is_vinyl, is_us, match_reason = best
+    else:
+        release_id = match_url = match_method = None
+        is_vinyl = is_us = False
+        match_reason = ""
+    status = "matched" if release_id and is_vinyl else "review_needed"
+    
+    confidence_level = confidence_bucket(match_method or "unknown", has_discogs, is_vinyl, is_us)
+    if status == "review_needed" and (not has_discogs) and other_candidates:
+        confidence_level = "very_low"
+    
+    return status, {
+        "owner": owner,
+        "image_filename": image_filename,
+        "image_gcs_uri": src_uri,
+        "status": status,
+        "confidence_level": confidence_level,
+        "discogs_release_id": release_id,
+        "discogs_url": match_url,
+        "candidate_source": ("discogs" if has_discogs else ("other" if other_candidates else "none")),
+        "has_discogs_candidate": has_discogs,
+        "candidate_discogs_urls_top3": "; ".join(discogs_candidates[:3]) if discogs_candidates else None,
+        "candidate_other_urls_top3": "; ".join(other_candidates) if (other_candidates and not has_discogs) else None,
+        "artist_hint": artist_hint,
+        "album_hint": album_hint,
+        "best_guess_label": best_guess_label,
+        "error_message": None,
+        "match_reason": match_reason if release_id else None
+    }
 
 
 def process_vision_responses(resp_dicts, test_mode=False):
-    """Process Vision API responses and match with Discogs."""
-    rows = []
+    """
+    Process Vision API responses and match with Discogs.
+    Images are matched on DISCOGS_CONCURRENCY threads (all Discogs calls share one rate limiter).
+    Yields one row dict per response in input order; the summary prints once all rows are consumed.
+    """
     summary = {"matched": 0, "review_needed": 0, "errors": 0}
     total_images = len(resp_dicts)
     print(f"Processing {total_images} images with Discogs API…")
-    
-    for idx, resp in enumerate(resp_dicts, 1):
-        if idx % 10 == 0 or idx == total_images:
-            print(f"Processing image {idx}/{total_images}...")
-        src_uri = (resp.get("context") or {}).get("uri")
-        image_filename = filename_from_gcs_uri(src_uri) if src_uri else ""
-        owner = extract_owner_from_uri(src_uri)  # CSV owner: first folder after "covers"
-        
-        # Per-response Vision errors
-        err = resp.get("error")
-        if err:
-            summary["errors"] += 1
-            rows.append({
-                "owner": owner,
-                "image_filename": image_filename,
-                "image_gcs_uri": src_uri,
-                "status": "review_needed",
-                "confidence_level": "unknown",
-                "discogs_release_id": None,
-                "discogs_url": None,
-                "candidate_source": "none",
-                "has_discogs_candidate": False,
-                "candidate_discogs_urls_top3": None,
-                "candidate_other_urls_top3": None,
-                "artist_hint": None,
-                "album_hint": None,
-                "best_guess_label": None,
-                "error_message": err.get("message")
-            })
-            continue
-        
-        web = resp.get("webDetection", {}) or {}
-        discogs_candidates, other_candidates = split_top_candidate_urls(web, limit=10)
-        has_discogs = bool(discogs_candidates)
-        
-        release_id = None
-        match_url = None
-        match_method = None
-        is_vinyl = False
-        is_us = False
-        match_reason = ""
-        artist_hint = album_hint = None
-        
-        # A) Harvest Discogs candidates from Vision (up to 10)
-        release_candidates = []
-        master_candidates = []
-        
-        for page in web.get("pagesWithMatchingImages", [])[:10]:
-            url = page.get("url") or ""
-            mtype, rid = extract_release_or_master(url)
-            if mtype == "release" and rid:
-                release_candidates.append((rid, url))
-            elif mtype == "master" and rid:
-                master_candidates.append((rid, url))
-        
-        # B) Try release URLs first (validate vinyl+US)
-        for rid, url in release_candidates:
-            img_context = f"image {idx}/{total_images}"
-            release_data = discogs_get_release(rid, context=img_context)
-            if release_data:
-                is_vinyl, is_us, reason = validate_release_is_vinyl_and_us(release_data)
-                if is_vinyl and is_us:
-                    release_id = rid
-                    match_url = url
-                    match_method = "release_url"
-                    match_reason = reason
-                    break
-                elif is_vinyl:
-                    # Keep as fallback if no US vinyl found
-                    if not release_id:
-                        release_id = rid
-                        match_url = url
-                        match_method = "release_url"
-                        match_reason = reason
-        
-        # C) Try master URLs (resolve with vinyl+US preference)
-        if not release_id or not is_us:
-            for mid, url in master_candidates:
-                img_context = f"image {idx}/{total_images}"
-                result = discogs_release_from_master(mid, context=img_context)
-                if isinstance(result, tuple) and len(result) == 4:
-                    candidate_id, candidate_vinyl, candidate_us, reason = result
-                    if candidate_id:
-                        if candidate_vinyl and candidate_us:
-                            # Perfect match - use this
-                            release_id = candidate_id
-                            match_url = url
-                            match_method = "master_url"
-                            is_vinyl = True
-                            is_us = True
-                            match_reason = reason
-                            break
-                        elif candidate_vinyl and not release_id:
-                            # Fallback if we don't have a candidate yet
-                            release_id = candidate_id
-                            match_url = url
-                            match_method = "master_url"
-                            is_vinyl = True
-                            is_us = False
-                            match_reason = reason
-        
-        # D) Fallback: OCR + Discogs search with filters
-        if not release_id:
-            text_ann = resp.get("textAnnotations") or []
-            text = (text_ann[0].get("description", "") if text_ann else "") or ""
-            parts = [p.strip() for p in text.splitlines() if p.strip()]
-            if len(parts) >= 2:
-                artist_hint, album_hint = parts[0], parts[1]
-            bgl = (web.get("bestGuessLabels") or [{}])[0].get("label")
-            if (not album_hint) and bgl and " - " in bgl:
-                try:
-                    artist_hint, album_hint = [s.strip() for s in bgl.split(" - ", 1)]
-                except Exception:
-                    pass
-            
-            img_context = f"image {idx}/{total_images}"
-            search_results = cached_discogs_search(artist_hint or "", album_hint or "", context=img_context) if (artist_hint or album_hint) else []
-            
-            # Validate search results - prefer vinyl+US
-            for hit in search_results:
-                candidate_id = hit.get("id")
-                if candidate_id:
-                    release_data = discogs_get_release(candidate_id, context=img_context)
-                    if release_data:
-                        candidate_vinyl, candidate_us, reason = validate_release_is_vinyl_and_us(release_data)
-                        if candidate_vinyl and candidate_us:
-                            release_id = candidate_id
-                            match_url = hit.get("uri")
-                            match_method = "search_fallback"
-                            is_vinyl = True
-                            is_us = True
-                            match_reason = reason
-                            break
-                        elif candidate_vinyl and not release_id:
-                            # Fallback if no US vinyl found
-                            release_id = candidate_id
-                            match_url = hit.get("uri")
-                            match_method = "search_fallback"
-                            is_vinyl = True
-                            is_us = False
-                            match_reason = reason
-        
-        # Determine status and confidence
-        if release_id:
-            # Validate final choice if not already validated
-            if not match_reason:
-                release_data = discogs_get_release(release_id, context=f"image {idx}/{total_images}")
-                if release_data:
-                    is_vinyl, is_us, match_reason = validate_release_is_vinyl_and_us(release_data)
-            
-            # Mark as review_needed if not vinyl
-            if not is_vinyl:
-                status = "review_needed"
-            else:
-                status = "matched"
-        else:
-            status = "review_needed"
-        
-        confidence_level = confidence_bucket(match_method or "unknown", has_discogs, is_vinyl, is_us)
-        if status == "review_needed" and (not has_discogs) and other_candidates:
-            confidence_level = "very_low"
-        
-        summary[status] += 1
-        
-        rows.append({
-            "owner": owner,
-            "image_filename": image_filename,
-            "image_gcs_uri": src_uri,
-            "status": status,
-            "confidence_level": confidence_level,
-            "discogs_release_id": release_id,
-            "discogs_url": match_url,
-            "candidate_source": ("discogs" if has_discogs else ("other" if other_candidates else "none")),
-            "has_discogs_candidate": has_discogs,
-            "candidate_discogs_urls_top3": "; ".join(discogs_candidates[:3]) if discogs_candidates else None,
-            "candidate_other_urls_top3": "; ".join(other_candidates) if (other_candidates and not has_discogs) else None,
-            "artist_hint": artist_hint,
-            "album_hint": album_hint,
-            "best_guess_label": ((web.get("bestGuessLabels") or [{}])[0].get("label")),
-            "error_message": None,
-            "match_reason": match_reason if release_id else None
-        })
-    
+    milestones = progress_milestones(total_images)
+    
+    with ThreadPoolExecutor(max_workers=DISCOGS_CONCURRENCY) as executor:
+        results = executor.map(lambda item: process_one_response(item[0], item[1], total_images),
+                               enumerate(resp_dicts, 1))
+        for idx, (summary_key, row) in enumerate(results, 1):
+            if idx in milestones:
+                print(f"Processed image {idx}/{total_images}...")
+            summary[summary_key] += 1
+            yield row
+    
+    save_discogs_cache()
     print(f"Vision summary → matched: {summary['matched']}, review_needed: {summary['review_needed']}, errors: {summary['errors']}")
-    return rows
 
 
 def add_to_collection_and_organize(release_to_folder):
@@ -380,79 +415,94 @@ def add_to_collection_and_organize(release_to_folder):
     print(f"Adding {len(to_add)} releases…")
     added = 0
     total_to_add = len(to_add)
+    milestones = progress_milestones(total_to_add, step=5)
+    
+    # Folder lookup/creation doesn't depend on the adds: start it now in the background
+    # so the folder IDs are ready by the time releases are moved
+    unique_folders = set(release_to_folder.values())
+    folders_executor = ThreadPoolExecutor(max_workers=1)
+    folders_future = folders_executor.submit(discogs_get_or_create_folders, DISCOGS_USER, unique_folders)
+    folders_executor.shutdown(wait=False)
+    
+    # Check if already in collection (Uncategorized folder, where new releases are added), listed once
+    in_uncategorized = discogs_list_folder_instances(DISCOGS_USER, 1)
     
-    for add_idx, rid in enumerate(to_add, 1):
+    def add(item):
+        add_idx, rid = item
         try:
-            # Check if already in collection (search Uncategorized folder where new releases are added)
-            instance_id, actual_folder_id = discogs_get_instance_for_release(DISCOGS_USER, rid, folder_id=1)
-            
-            if not instance_id:
+            if rid not in in_uncategorized:
                 # Add to collection (conditions will be set at the end)
                 discogs_add_to_collection(DISCOGS_USER, rid, DISCOGS_FOLDER_ID)
-                time.sleep(0.6)  # Rate limiting
-                # Get instance_id after adding (it will be in Uncategorized folder)
-                instance_id, actual_folder_id = discogs_get_instance_for_release(DISCOGS_USER, rid, folder_id=1)
-            
-            added += 1
-            if add_idx % 5 == 0 or add_idx == total_to_add:
-                print(f"Added {add_idx}/{total_to_add} releases...")
-            time.sleep(1.1)  # ~60/min pacing
+            return True
         except Exception as e:
             error_msg = str(e)
             # If it's a 409 (already exists), that's fine
             if "409" in error_msg or "already" in error_msg.lower():
-                added += 1  # Count as success
-                continue
+                return True  # Count as success
             print(f"Add failed for release {rid} ({add_idx}/{total_to_add}): {e}")
+            return False
+    
+    # Releases are independent: add several at once, paced by the shared Discogs rate limiter
+    with ThreadPoolExecutor(max_workers=DISCOGS_CONCURRENCY) as executor:
+        for add_idx, ok in enumerate(executor.map(add, enumerate(to_add, 1)), 1):
+            added += ok
+            if add_idx in milestones:
+                print(f"Added {add_idx}/{total_to_add} releases...")
     print(f"Added {added} releases.")
     
     # Create folders and organize releases by Discogs folder name
     print("Organizing releases into Discogs folders...")
-    if DISCOGS_USER and DISCOGS_TOKEN:
-        # Get unique folder names from releases we just added
-        unique_folders = set(release_to_folder.values())
-        
-        # Create folders for each unique folder name
-        discogs_folders = {}
-        for folder_name in unique_folders:
-            if not folder_name:
-                continue
-            folder_id = discogs_get_or_create_folder(DISCOGS_USER, folder_name)
-            if folder_id:
-                discogs_folders[folder_name] = folder_id
-                time.sleep(0.5)  # Rate limiting
-        
-        # Move releases to appropriate folders
-        moved_count = 0
-        found_in_uncategorized = 0
-        
-        for rid, folder_name in release_to_folder.items():
-            if not folder_name or folder_name not in discogs_folders:
-                continue
-            
-            try:
-                # Search Uncategorized folder (where new releases are added by default)
-                instance_id, current_folder_id = discogs_get_instance_for_release(DISCOGS_USER, rid, folder_id=1)
-                if not instance_id:
-                    continue
-                
-                found_in_uncategorized += 1
-                target_folder_id = discogs_folders[folder_name]
-                if current_folder_id != target_folder_id:
-                    success = discogs_move_instance(
-                        DISCOGS_USER, rid, instance_id, 
-                        current_folder_id, target_folder_id
-                    )
-                    if success:
-                        moved_count += 1
-                    time.sleep(0.8)  # Rate limiting
-            except Exception as e:
-                print(f"Warning: Failed to move release {rid} to folder '{folder_name}': {e}")
-        
-        if found_in_uncategorized == 0:
-            print("No records found in Uncategorized folder. Nothing to move.")
-        else:
-            print(f"Moved {moved_count} releases to Discogs folders.")
+    # Folder IDs for each unique folder name (looked up/created while the adds ran)
+    discogs_folders = folders_future.result()
+    
+    # Move releases to appropriate folders
+    found_in_uncategorized, moved_count = move_releases_to_folders(release_to_folder, discogs_folders)
+
+    if found_in_uncategorized == 0:
+        print("No records found in Uncategorized folder. Nothing to move.")
+    else:
+        print(f"Moved {moved_count} releases to Discogs folders.")
+
+
+def cache_vision_responses(vision_cache, resp_dicts):
+    """Store new Vision responses in the cache (appended to its on-disk log and flushed)."""
+    for resp in resp_dicts:
+        src_uri = (resp.get("context") or {}).get("uri")
+        if src_uri:
+            set_vision_result(vision_cache, src_uri, resp)
+    flush_vision_cache()
+
+
+def _download_blob(bucket, name):
+    """Download one image's bytes, downscaled for Vision; returns None (and warns) on failure."""
+    try:
+        content = bucket.blob(name).download_as_bytes()  # runtime SA reads; no Vision SA needed
+    except Exception as e:
+        print(f"WARNING: Failed to download {name}: {e}. Skipping.")
+        return None
+    return prepare_image_bytes(content)
+
+
+def _download_images(bucket, imgs_to_process, max_in_flight):
+    """
+    Yield (uri, content) for each (name, uri) in input order, downloading on GCS_DOWNLOAD_WORKERS threads.
+    At most max_in_flight downloads are pending or buffered at once, so memory stays bounded
+    when Vision consumes images more slowly than they download. Failed downloads are skipped.
+    """
+    pending = deque()  # (uri, future) in submission order
+    with ThreadPoolExecutor(max_workers=GCS_DOWNLOAD_WORKERS) as executor:
+        for name, uri in imgs_to_process:
+            pending.append((uri, executor.submit(_download_blob, bucket, name)))
+            while len(pending) >= max_in_flight:
+                uri_done, future = pending.popleft()
+                content = future.result()
+                if content is not None:
+                    yield uri_done, content
+        while pending:
+            uri_done, future = pending.popleft()
+            content = future.result()
+            if content is not None:
+                yield uri_done, content
 
 
 def main_workflow(test_discogs_match=False):
@@ -461,8 +511,7 @@ def main_workflow(test_discogs_match=False):
     try:
         gcs = storage.Client()
         bucket = gcs.bucket(GCS_BUCKET)
-        imgs = [b.name for b in bucket.list_blobs(prefix=config.INPUT_PREFIX)
-                if b.name.lower().endswith((".jpg", ".jpeg", ".png"))]
+        imgs = list(list_image_names(bucket, config.INPUT_PREFIX))
     except DefaultCredentialsError as e:
         creds_path = os.environ.get("GOOGLE_APPLICATION_CREDENTIALS", "not set")
         raise SystemExit(
@@ -484,7 +533,16 @@ def main_workflow(test_discogs_match=False):
         raise SystemExit(f"No images found under gs://{GCS_BUCKET}/{config.INPUT_PREFIX}")
     print(f"Found {len(imgs)} images under gs://{GCS_BUCKET}/{config.INPUT_PREFIX}")
     
-    # Vision (SYNC: Web + Text; no GCS output needed)
+    # The existing-collection listing doesn't depend on any matching results: start it now in the
+    # background so it is done by the time the de-dup step needs it. Started only once GCS access
+    # and the image listing succeeded, so early exits don't wait on (or spend rate limit for) it
+    existing_ids_future = None
+    if DISCOGS_USER and DISCOGS_TOKEN and not test_discogs_match:
+        collection_executor = ThreadPoolExecutor(max_workers=1)
+        existing_ids_future = collection_executor.submit(discogs_list_all_collection_release_ids, DISCOGS_USER)
+        collection_executor.shutdown(wait=False)
+    
+    # Vision (Web + Text): sync calls by default; optional async batch with GCS output for large runs
     # Load existing Vision results
     vision_cache = load_vision_cache()
     print(f"Loaded {len(vision_cache)} cached Vision results.")
@@ -525,31 +583,35 @@ def main_workflow(test_discogs_match=False):
             vision.Feature(type_=vision.Feature.Type.TEXT_DETECTION, max_results=10),
         ]
         
-        requests_list, src_uris = [], []
-        for name, uri in imgs_to_process:
-            try:
-                content = bucket.blob(name).download_as_bytes()  # runtime SA reads; no Vision SA needed
-            except Exception as e:
-                print(f"WARNING: Failed to download {name}: {e}. Skipping.")
-                continue
-            src_uris.append(uri)
-            requests_list.append(
-                vision.AnnotateImageRequest(
-                    image=vision.Image(content=content),
-                    features=features
-                )
+        use_async_batch = VISION_USE_ASYNC_BATCH and len(imgs_to_process) >= VISION_ASYNC_MIN_IMAGES
+        if use_async_batch:
+            # Large runs: one long-running operation per 2000 images, reading images straight from GCS
+            # (the Vision service agent needs read access to the bucket and write access to the output prefix)
+            vision_items = [
+                (uri, vision.AnnotateImageRequest(image=vision.Image(source=vision.ImageSource(image_uri=uri)),
+                                                  features=features))
+                for name, uri in imgs_to_process
+            ]
+            print(f"Submitting {len(imgs_to_process)} images to Vision API (async batch)…")
+            new_responses = run_vision_async_batch(vision_client, gcs, vision_items, VISION_ASYNC_OUTPUT_PREFIX)
+        else:
+            # Downloads are independent HTTPS GETs: fetch them concurrently, and hand each image
+            # to Vision as soon as it (and those before it) have arrived so batches overlap downloads.
+            # Prefetch is capped at two Vision chunks ahead so image bytes don't pile up in memory
+            downloads = _download_images(bucket, imgs_to_process, max_in_flight=2 * VISION_SYNC_CHUNK)
+            vision_items = (
+                (uri, vision.AnnotateImageRequest(image=vision.Image(content=content), features=features))
+                for uri, content in downloads
             )
+            print(f"Submitting {len(imgs_to_process)} images to Vision API…")
+            # Each batch is appended to the cache log as it arrives, so an interrupted run keeps its results
+            new_responses = run_vision_sync(vision_client, vision_items,
+                                            on_batch=lambda dicts: cache_vision_responses(vision_cache, dicts))
         
-        if requests_list:
-            print(f"Submitting {len(requests_list)} images to Vision API…")
-            new_responses = run_vision_sync(vision_client, requests_list, src_uris)
+        if new_responses:
             print(f"Got {len(new_responses)} responses from Vision.")
-            
-            # Save new results to cache immediately
-            for resp in new_responses:
-                src_uri = (resp.get("context") or {}).get("uri")
-                if src_uri:
-                    set_vision_result(vision_cache, src_uri, resp)
+            if use_async_batch:  # The sync path cached each batch as it arrived
+                cache_vision_responses(vision_cache, new_responses)
             save_vision_cache(vision_cache)
     
     # Combine cached and new responses
@@ -566,6 +628,7 @@ def main_workflow(test_discogs_match=False):
     
     # In test mode, show results and exit
     if test_discogs_match:
+        rows = list(rows)
         print("\n" + "="*80)
         print("TEST MODE RESULTS - First 10 images:")
         print("="*80)
@@ -586,42 +649,39 @@ def main_workflow(test_discogs_match=False):
         print("Test mode complete. No CSV written, no collection updates performed.")
         return
     
-    # Write CSV (pre-dedup)
-    df = pd.DataFrame(rows)
-    
     # De-dup: mark what's already in your collection and skip adding them
-    if DISCOGS_USER and DISCOGS_TOKEN:
+    existing_ids = set()
+    if existing_ids_future is not None:
         print("Fetching existing collection to avoid duplicates…")
-        existing_ids = discogs_list_all_collection_release_ids(DISCOGS_USER)
+        existing_ids = existing_ids_future.result()
         print(f"Found {len(existing_ids)} releases already in your collection.")
-        df["already_in_collection"] = df["discogs_release_id"].apply(
-            lambda x: (int(x) in existing_ids) if pd.notna(x) else False
-        )
-    else:
-        df["already_in_collection"] = False
-    
-    out_csv = "records.csv"
-    df.to_csv(out_csv, index=False)
-    print(f"Wrote {len(df)} rows to {out_csv}")
     
-    # Add matched releases to Discogs collection (skip duplicates)
-    add_mask = (df["status"] == "matched") & (~df["already_in_collection"])
     # Build mapping of release_id -> discogs_folder_name for folder organization
     # Note: CSV "owner" is just the first folder, but Discogs folder name includes all subfolders
     release_to_folder = {}
-    for _, row in df.loc[add_mask].iterrows():
-        rid = row.get("discogs_release_id")
-        src_uri = row.get("image_gcs_uri", "")
-        if rid and src_uri:
-            try:
-                # Extract full Discogs folder name (e.g., "Dad_Shed") from URI
-                discogs_folder_name = owner_from_gcs_uri(src_uri)
-                if discogs_folder_name:  # Only add if we have a folder name
-                    release_to_folder[int(rid)] = discogs_folder_name
-            except (ValueError, TypeError):
-                continue
+    matched_count = 0
+    
+    def csv_rows():
+        # Rows are written as they are matched, so the full result set is never held in memory
+        nonlocal matched_count
+        for row in rows:
+            rid = row["discogs_release_id"]
+            row["already_in_collection"] = rid is not None and int(rid) in existing_ids
+            if row["status"] == "matched":
+                matched_count += 1
+                src_uri = row["image_gcs_uri"]
+                if rid and src_uri and not row["already_in_collection"]:
+                    # Extract full Discogs folder name (e.g., "Dad_Shed") from URI
+                    discogs_folder_name = owner_from_gcs_uri(src_uri)
+                    if discogs_folder_name:  # Only add if we have a folder name
+                        release_to_folder[int(rid)] = discogs_folder_name
+            yield row
+    
+    out_csv = "records.csv"
+    written = write_dicts_csv(out_csv, csv_rows(), RECORDS_CSV_FIELDS)
+    print(f"Wrote {written} rows to {out_csv}")
     
-    skipped_dupes = int((df["status"] == "matched").sum() - len(release_to_folder))
+    skipped_dupes = matched_count - len(release_to_folder)
     print(f"Adding {len(release_to_folder)} releases (skipped {skipped_dupes} already in your collection)…")
     
     add_to_collection_and_organize(release_to_folder)